@@ -0,0 +1,215 @@
+"""
+Original post-processing of protocol PDF, kept only as benchmark baseline.
+
+Every function reopens and rewrites the whole file, as the generator did
+before PDF assembly moved into PdfAssembler and footer into canvas rendering.
+"""
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4, letter
+from pypdf import PdfReader, PdfWriter
+from pypdf.generic import (DictionaryObject, NumberObject, NameObject,
+                           TextStringObject, ArrayObject, FloatObject)
+
+from TMU_ProtocolGenerator import fonts
+
+def add_text_label(pdf_file, text, position, page_number=0):
+    """
+    Adds text label to PDF file.
+
+    Args:
+        pdf_file (str): Path to PDF file
+        text (str): Text to add
+        page_number (int): Page number where to add text (0-based)
+        position (tuple): (x, y) coordinates for text position
+
+    Returns:
+        None
+    """
+    def create_text_page(text, position):
+        fonts.register()
+        packet = io.BytesIO()
+        can = canvas.Canvas(packet, pagesize=letter)
+
+        # Set font for diacritic support
+        can.setFont('Arial', 10)
+
+        can.drawString(position[0], position[1], text)
+        can.save()
+        packet.seek(0)
+        return PdfReader(packet)
+
+    reader = PdfReader(pdf_file)
+    writer = PdfWriter()
+
+    # Check if requested page exists
+    if page_number >= len(reader.pages):
+        raise ValueError(f"PDF has only {len(reader.pages)} pages, cannot add text to page {page_number + 1}")
+
+    # Copy all pages
+    writer.append_pages_from_reader(reader)
+
+    # Add text to specified page
+    page = writer.pages[page_number]
+    text_pdf = create_text_page(text, position)
+    page.merge_page(text_pdf.pages[0])
+
+    # Save changes
+    with open(pdf_file, "wb") as fp:
+        writer.write(fp)
+
+def add_footer(pdf_file, protocol_number):
+    """
+    Adds page numbers and protocol number to PDF file footer.
+
+    Args:
+        pdf_file (str): Path to PDF file
+        protocol_number (str): Protocol number to be added
+
+    Returns:
+        None
+    """
+    reader = PdfReader(pdf_file)
+    total_pages = len(reader.pages)
+
+    for page_num in range(total_pages):
+        # Add page numbers
+        page_num_text = f"{page_num + 1}/{total_pages}"
+        add_text_label(pdf_file, page_num_text, position=(535, 20), page_number=page_num)
+
+        # Add protocol number
+        page_num_protocol = f"Číslo protokolu: {protocol_number}"
+        add_text_label(pdf_file, page_num_protocol, position=(42, 20), page_number=page_num)
+
+def add_footer_overlay(writer, protocol_number):
+    """
+    Adds footer to all pages of writer through one overlay document.
+
+    Every page is merged exactly once, overlay pages take size of the page
+    they are merged into.
+
+    Args:
+        writer (PdfWriter): Document with all pages appended
+        protocol_number (str): Protocol number to be added
+
+    Returns:
+        None
+    """
+    total_pages = len(writer.pages)
+
+    fonts.register()
+    packet = io.BytesIO()
+    can = canvas.Canvas(packet)
+    for page_num, page in enumerate(writer.pages):
+        width, height = float(page.mediabox.width), float(page.mediabox.height)
+        can.setPageSize((width, height))
+        can.setFont('Arial', 10)
+        can.drawString(535 + width - A4[0], 20, f"{page_num + 1}/{total_pages}")
+        can.drawString(42, 20, f"Číslo protokolu: {protocol_number}")
+        can.showPage()
+    can.save()
+    packet.seek(0)
+
+    overlay = PdfReader(packet)
+    for page, overlay_page in zip(writer.pages, overlay.pages):
+        page.merge_page(overlay_page)
+
+def add_comment_to_pdf(pdf_file, title, text_list, position):
+    """
+    Adds a comment (annotation) to PDF file.
+
+    Args:
+        pdf_file (str): Path to PDF file
+        title (str): Comment title
+        text_list (list): List of text lines to be added in comment
+        position (tuple): (x, y) coordinates for comment position
+
+    Returns:
+        None
+    """
+    def create_text_annotation(x, y, title, text):
+        text_annotation = DictionaryObject()
+        text_annotation.update({
+            NameObject("/F"): NumberObject(4),
+            NameObject("/Type"): NameObject("/Annot"),
+            NameObject("/Subtype"): NameObject("/Text"),
+            NameObject("/T"): TextStringObject(title),
+            NameObject("/Contents"): TextStringObject(text),
+            NameObject("/Rect"): ArrayObject([
+                FloatObject(x),
+                FloatObject(y),
+                FloatObject(x + 20),
+                FloatObject(y + 20)
+            ]),
+            NameObject("/C"): ArrayObject([FloatObject(1), FloatObject(1), FloatObject(0.8)]),
+            NameObject("/Open"): NameObject("/true")
+        })
+        return text_annotation
+
+    reader = PdfReader(pdf_file)
+    writer = PdfWriter()
+
+    if len(reader.pages) > 0:
+        writer.append_pages_from_reader(reader)
+        page = writer.pages[0]
+
+        if text_list:
+            annotation = create_text_annotation(
+                x=position[0],
+                y=position[1],
+                title=title,
+                text=f"{title}:\n" + "\n".join(text_list)
+            )
+            if "/Annots" in page:
+                page["/Annots"].append(annotation)
+            else:
+                page[NameObject("/Annots")] = ArrayObject([annotation])
+
+    with open(pdf_file, "wb") as fp:
+        writer.write(fp)
+
+def add_error_comments_to_pdf(pdf_file, fixable_errors, unfixable_errors):
+    """
+    Adds error comments to PDF file.
+
+    Args:
+        pdf_file (str): Path to PDF file
+        fixable_errors (list): List of fixable errors
+        unfixable_errors (list): List of unfixable errors
+
+    Returns:
+        None
+    """
+    if unfixable_errors:
+        add_comment_to_pdf(pdf_file, "Neopraviteľné zmätky", unfixable_errors, (525, 607))
+
+    if fixable_errors:
+        add_comment_to_pdf(pdf_file, "Opraviteľné zmätky", fixable_errors, (525, 584))
+
+def add_attachments_to_pdf(pdf_file, attachment_list):
+    """
+    Adds files as attachments to PDF document.
+
+    Args:
+        pdf_file (str): Path to PDF file
+        attachment_list (list): List of file paths to attach
+
+    Returns:
+        None
+    """
+    reader = PdfReader(pdf_file)
+    writer = PdfWriter()
+    writer.append_pages_from_reader(reader)
+
+    for attachment in attachment_list:
+        if os.path.exists(attachment):
+            with open(attachment, "rb") as file:
+                writer.add_attachment(attachment, file.read())
+
+    with open(pdf_file, "wb") as output_file:
+        writer.write(output_file)
@@ -0,0 +1,163 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import TMU_ProtocolGenerator as generator
+from synthetic_reports import generate_reports
+
+def current_rss():
+    """Return resident set size of this process in bytes (None if not available)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def reset_peak_rss():
+    """
+    Reset peak resident set size, so it covers only following stage.
+
+    Returns:
+        bool: True if peak was reset (Linux only)
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss():
+    """Return peak resident set size of this process in bytes (None if not available)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        return None
+
+def measure(report_dir, count, chunk_pages, use_tracemalloc):
+    """
+    Process reports and render protocol, measuring memory of rendering.
+
+    Runs in its own process, so peak RSS belongs to this measurement only.
+
+    Returns:
+        dict: Measured values
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        json_processor = generator.JsonProcessor(1, count, path=report_dir)
+        if not json_processor.process_files():
+            raise RuntimeError("Spracovanie syntetických reportov zlyhalo")
+        job = generator.prepare_protocol_job(json_processor, "BENCH", "XXXXYYYY_YYMMDD", "Benchmark", "",
+                                             {}, True, os.path.join(report_dir, "..", "output"),
+                                             chunk_pages=chunk_pages)
+        del json_processor
+
+        if use_tracemalloc:
+            import tracemalloc
+            tracemalloc.start()
+
+        # Without reset, peak may come from processing of reports
+        peak_reset = reset_peak_rss()
+        rss_before = current_rss()
+        start = time.perf_counter()
+        output_file = generator.render_protocol(job)
+        elapsed = time.perf_counter() - start
+
+        traced_peak = None
+        if use_tracemalloc:
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    # Peak is read before output is opened for page count
+    rss_peak = peak_rss()
+    return {
+        "units": count,
+        "chunk_pages": chunk_pages,
+        "pages": len(generator.PdfReader(output_file).pages),
+        "time": elapsed,
+        "rss_before": rss_before,
+        "peak_rss": rss_peak,
+        "peak_reset": peak_reset,
+        "traced_peak": traced_peak,
+        "size": os.path.getsize(output_file)
+    }
+
+def run_child(report_dir, count, chunk_pages, use_tracemalloc):
+    """Run one measurement in separate process and return its result."""
+    command = [sys.executable, os.path.abspath(__file__), "--child", report_dir, "--units", str(count),
+               "--chunk-pages", str(chunk_pages or 0)]
+    if use_tracemalloc:
+        command.append("--tracemalloc")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def _megabytes(value):
+    return f"{value / 2**20:10.1f}" if value is not None else f"{'-':>10}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Pamäť pri vykresľovaní protokolu: celý dokument vs. po častiach")
+    parser.add_argument("--units", type=int, nargs="+", default=[1000, 5000, 10000], help="Počty syntetických modulov")
+    parser.add_argument("--chunk-pages", type=int, default=200, help="Počet strán v jednej časti")
+    parser.add_argument("--skip-full", action="store_true", help="Nemerať vykreslenie celého dokumentu v pamäti")
+    parser.add_argument("--tracemalloc", action="store_true", help="Merať aj špičku alokácií Pythonu (pomalšie)")
+    parser.add_argument("--child", metavar="REPORT_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = measure(args.child, args.units[0], args.chunk_pages or None, args.tracemalloc)
+        print(json.dumps(result))
+        return
+
+    print("Moduly  Strany  Režim         Čas [s]  RSS pred [MB]  Max RSS [MB]  Vykreslenie [MB]  Alokácie [MB]")
+    for count in args.units:
+        work_dir = tempfile.mkdtemp(prefix="tmu_bench_")
+        try:
+            report_dir = os.path.join(work_dir, "reports")
+            generate_reports(report_dir, count)
+
+            variants = [("po častiach", args.chunk_pages)]
+            if not args.skip_full:
+                variants.insert(0, ("celý", None))
+
+            for name, chunk_pages in variants:
+                result = run_child(report_dir, count, chunk_pages, args.tracemalloc)
+                rendering = None
+                if result["peak_reset"] and result["peak_rss"] is not None and result["rss_before"] is not None:
+                    rendering = max(0, result["peak_rss"] - result["rss_before"])
+                print(f"{count:>6}  {result['pages']:>6}  {name:<12} {result['time']:8.2f}  "
+                      f"{_megabytes(result['rss_before'])}     {_megabytes(result['peak_rss'])}    "
+                      f"{_megabytes(rendering)}        {_megabytes(result['traced_peak'])}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
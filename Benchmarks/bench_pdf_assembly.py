@@ -0,0 +1,95 @@
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import TMU_ProtocolGenerator as generator
+import baseline_pdf
+from synthetic_reports import generate_reports
+
+def build_protocol(report_dir, count):
+    """Process synthetic reports and prepare protocol instance."""
+    json_processor = generator.JsonProcessor(1, count, path=report_dir)
+    if not json_processor.process_files():
+        raise RuntimeError("Spracovanie syntetických reportov zlyhalo")
+
+    protocol = generator.ProductionProtocol(
+        protocol_number="BENCH",
+        product_code=json_processor.get_card_type(),
+        min_pn=1,
+        max_pn=count,
+        production_doc="XXXXYYYY_YYMMDD",
+        worker_name="Benchmark",
+        check_date="01.01.2025",
+        tests=json_processor.get_reports()
+    )
+    protocol.display_all_reports = True
+    return protocol, json_processor.get_list_of_relevant_json_files()
+
+def _error_comments():
+    """Error comments of one repairable and one unrepairable unit, as added by render_protocol."""
+    annotations = generator.PageAnnotations()
+    annotations.add_error_comments(["V000001"], ["V000002"])
+    return annotations
+
+def run_chain(protocol, json_files, output_file):
+    """Original flow - every post-processing step rewrites the file."""
+    protocol.render_footer = False
+    protocol.create_pdf(output_file)
+    baseline_pdf.add_footer(output_file, protocol.protocol_number)
+    baseline_pdf.add_error_comments_to_pdf(output_file, ["V000001"], ["V000002"])
+    baseline_pdf.add_attachments_to_pdf(output_file, json_files)
+
+def run_assembler(protocol, json_files, output_file):
+    """Single-pass flow - canvas output is assembled in memory, footer merged as overlay, written once."""
+    protocol.render_footer = False
+    pdf_buffer = io.BytesIO()
+    protocol.create_pdf(pdf_buffer)
+    assembler = generator.PdfAssembler(pdf_buffer)
+    baseline_pdf.add_footer_overlay(assembler.writer, protocol.protocol_number)
+    assembler.add_annotations(_error_comments())
+    assembler.add_attachments(json_files)
+    assembler.write(output_file)
+
+def run_rendered_footer(protocol, json_files, output_file):
+    """Footer drawn during canvas rendering, comments and attachments assembled once."""
+    protocol.render_footer = True
+    pdf_buffer = io.BytesIO()
+    protocol.create_pdf(pdf_buffer)
+    assembler = generator.PdfAssembler(pdf_buffer)
+    assembler.add_annotations(_error_comments())
+    assembler.add_attachments(json_files)
+    assembler.write(output_file)
+
+def main():
+    parser = argparse.ArgumentParser(description="Porovnanie zostavenia PDF: reťazec prepisov vs. jeden zápis")
+    parser.add_argument("--units", type=int, default=100, help="Počet syntetických modulov")
+    parser.add_argument("--skip-chain", action="store_true", help="Nemerať pôvodný reťazec (pomalý pri veľkých dávkach)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="tmu_bench_")
+    try:
+        report_dir = os.path.join(work_dir, "reports")
+        generate_reports(report_dir, args.units)
+        protocol, json_files = build_protocol(report_dir, args.units)
+
+        variants = [("assembler", run_assembler), ("footer", run_rendered_footer)]
+        if not args.skip_chain:
+            variants.insert(0, ("chain", run_chain))
+
+        for name, function in variants:
+            output_file = os.path.join(work_dir, f"{name}.pdf")
+            start = time.perf_counter()
+            function(protocol, json_files, output_file)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<10} {args.units:>6} modulov  {elapsed:8.2f} s  {os.path.getsize(output_file) / 1024:10.1f} kB")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import TMU_ProtocolGenerator as generator
+import baseline_pdf
+from synthetic_reports import generate_reports
+
+STAGES = ("scan", "process_files", "create_pdf", "add_footer", "add_attachments")
+
+def _timed(function, *args):
+    """Run function with suppressed output, return (result, seconds)."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+def run_stages(report_dir, count, work_dir, footer_limit):
+    """
+    Run protocol pipeline on synthetic reports, timing every stage separately.
+
+    Stages work on the same files as in the original flow: canvas output is
+    written to disk and footer and attachments rewrite it. Stage
+    process_files includes its own scan of report tree.
+
+    Args:
+        report_dir (str): Directory with synthetic reports
+        count (int): Number of units
+        work_dir (str): Directory for output PDF
+        footer_limit (int): add_footer reparses file for every label, it is
+            skipped for larger lots (None - never skipped)
+
+    Returns:
+        tuple: (stage -> seconds or None if skipped, number of pages, PDF size)
+    """
+    times = {}
+
+    scanner = generator.JsonProcessor(1, count, path=report_dir)
+    files_index, times["scan"] = _timed(scanner._get_list_of_all_json_files)
+    if len(files_index) != count:
+        raise RuntimeError(f"Nájdených {len(files_index)} z {count} reportov")
+
+    json_processor = generator.JsonProcessor(1, count, path=report_dir)
+    success, times["process_files"] = _timed(json_processor.process_files)
+    if not success:
+        raise RuntimeError("Spracovanie syntetických reportov zlyhalo")
+
+    protocol = generator.ProductionProtocol(
+        protocol_number="BENCH",
+        product_code=json_processor.get_card_type(),
+        min_pn=1,
+        max_pn=count,
+        production_doc="XXXXYYYY_YYMMDD",
+        worker_name="Benchmark",
+        check_date="01.01.2025",
+        tests=json_processor.get_result_matrix()
+    )
+    protocol.display_all_reports = True
+    protocol.render_footer = False
+
+    output_file = os.path.join(work_dir, "stages.pdf")
+    _, times["create_pdf"] = _timed(protocol.create_pdf, output_file)
+    pages = len(generator.PdfReader(output_file).pages)
+
+    if footer_limit is None or count <= footer_limit:
+        _, times["add_footer"] = _timed(baseline_pdf.add_footer, output_file, protocol.protocol_number)
+    else:
+        times["add_footer"] = None
+
+    _, times["add_attachments"] = _timed(baseline_pdf.add_attachments_to_pdf, output_file,
+                                         json_processor.get_list_of_relevant_json_files())
+
+    return times, pages, os.path.getsize(output_file)
+
+def _library_version(name):
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Časy jednotlivých krokov generovania protokolu na syntetických reportoch")
+    parser.add_argument("--units", type=int, nargs="+", default=[10, 100, 1000, 10000], help="Počty syntetických modulov")
+    parser.add_argument("--runs", type=int, default=3, help="Počet reportov (behov testu) na modul")
+    parser.add_argument("--units-per-dir", type=int, default=250, help="Počet modulov v jednom podpriečinku")
+    parser.add_argument("--footer-limit", type=int, default=200,
+                        help="Vynechať add_footer pri väčšom počte modulov (0 - nikdy nevynechať)")
+    parser.add_argument("--output", default="bench_stages.json", help="Súbor s výsledkami (JSON)")
+    args = parser.parse_args()
+
+    results = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "reportlab": _library_version("reportlab"),
+        "pypdf": _library_version("pypdf"),
+        "runs_per_sn": args.runs,
+        "units_per_dir": args.units_per_dir,
+        "results": []
+    }
+
+    print(f"{'Moduly':>7} {'Súbory':>7} {'Strany':>7}" + "".join(f" {stage:>16}" for stage in STAGES))
+    for count in args.units:
+        work_dir = tempfile.mkdtemp(prefix="tmu_bench_")
+        try:
+            report_dir = os.path.join(work_dir, "reports")
+            files = generate_reports(report_dir, count, runs_per_sn=args.runs, units_per_dir=args.units_per_dir)
+            times, pages, size = run_stages(report_dir, count, work_dir, args.footer_limit or None)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        results["results"].append({
+            "units": count,
+            "files": len(files),
+            "pages": pages,
+            "size": size,
+            "stages": times
+        })
+        cells = "".join(f" {times[stage]:16.3f}" if times[stage] is not None else f" {'-':>16}" for stage in STAGES)
+        print(f"{count:>7} {len(files):>7} {pages:>7}{cells}")
+
+        # Results are saved after every lot, so long runs keep finished measurements
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+    print(f"\nVýsledky uložené do {args.output}")
+
+if __name__ == "__main__":
+    main()
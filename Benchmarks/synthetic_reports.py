@@ -0,0 +1,104 @@
+import argparse
+import copy
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+# Default template - sample report shipped with repository
+TEMPLATE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Samples_json",
+                             "BIOM.2.6MA", "BIOM.2.6MA#V000666_20250603_141404.json")
+
+def load_template(template_file=TEMPLATE_FILE):
+    """
+    Load report used as schema for synthetic reports.
+
+    Args:
+        template_file (str): Path to sample JSON report
+
+    Returns:
+        dict: Parsed report
+    """
+    with open(template_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def generate_reports(target_dir, count, start_sn=1, template=None, seed=0, runs_per_sn=1, units_per_dir=None):
+    """
+    Generate synthetic reports for consecutive serial numbers.
+
+    Latest run of every unit passes. Earlier runs (runs_per_sn > 1) have
+    older timestamps and failed first test, so they must not be selected
+    by the report scan.
+
+    Args:
+        target_dir (str): Directory where reports are written
+        count (int): Number of units
+        start_sn (int): First serial number
+        template (dict): Report used as schema (sample report if None)
+        seed (int): Random seed for measured values
+        runs_per_sn (int): Number of reports (test runs) per serial number
+        units_per_dir (int): Spread reports into card type/day subdirectories
+            with this many units each (None - all reports in target_dir)
+
+    Returns:
+        list: Paths of generated files
+    """
+    if template is None:
+        template = load_template()
+
+    rng = random.Random(seed)
+    card_type = template["CardTypeName"]
+    start = datetime(2025, 6, 3, 14, 14, 4)
+    os.makedirs(target_dir, exist_ok=True)
+
+    files = []
+    for index, sn in enumerate(range(start_sn, start_sn + count)):
+        directory = target_dir
+        day = start
+        if units_per_dir:
+            day = start + timedelta(days=index // units_per_dir)
+            directory = os.path.join(target_dir, card_type, day.strftime("%Y%m%d"))
+            os.makedirs(directory, exist_ok=True)
+
+        for run in range(runs_per_sn):
+            latest = run == runs_per_sn - 1
+            data = copy.deepcopy(template)
+            data["Passed"] = latest
+            data["AllTestsDone"] = True
+            data["SafeBytes"]["SN"] = sn
+
+            for test in data["Tests"]:
+                test["Passed"] = True
+                if isinstance(test["ResultDesc"], float) and "Min" in test and "Max" in test:
+                    test["ResultDesc"] = round(rng.uniform(test["Min"], test["Max"]), 6)
+            if not latest:
+                data["Tests"][0]["Passed"] = False
+
+            # Repeated runs of one unit are one hour apart
+            timestamp = day + timedelta(seconds=sn, hours=run)
+            data["Start"] = timestamp.strftime("%Y-%m-%dT%H:%M:%S")
+            filename = f"{card_type}#V{sn:06d}_{timestamp.strftime('%Y%m%d_%H%M%S')}.json"
+            full_path = os.path.join(directory, filename)
+
+            with open(full_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4)
+            files.append(full_path)
+
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(description="Generovanie syntetických reportov podľa vzorového reportu")
+    parser.add_argument("target_dir", help="Cieľový priečinok")
+    parser.add_argument("--units", type=int, default=100, help="Počet modulov")
+    parser.add_argument("--start-sn", type=int, default=1, help="Prvé výrobné číslo")
+    parser.add_argument("--runs", type=int, default=1, help="Počet reportov (behov testu) na modul")
+    parser.add_argument("--units-per-dir", type=int, help="Rozdeliť reporty do podpriečinkov po N moduloch")
+    parser.add_argument("--template", default=TEMPLATE_FILE, help="Vzorový report")
+    args = parser.parse_args()
+
+    files = generate_reports(args.target_dir, args.units, args.start_sn, load_template(args.template),
+                             runs_per_sn=args.runs, units_per_dir=args.units_per_dir)
+    print(f"Vytvorených {len(files)} reportov v {args.target_dir}")
+
+if __name__ == "__main__":
+    main()
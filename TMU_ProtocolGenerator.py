@@ -6,29 +6,429 @@ from enum import Enum
 import json
 import ctypes
 import re
-import tkinter as tk
-from tkinter import filedialog
 import io
+import argparse
+import sys
+import csv
+import copy
+import math
+from collections import deque
+from array import array
+import time
+import contextlib
+import functools
+import pickle
+import hashlib
+import zlib
+import threading
 
-try:
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib import colors
-    from reportlab.lib.units import mm
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    from reportlab.lib.pagesizes import letter
-
-    from pypdf import PdfReader, PdfWriter
-    from pypdf.generic import (DictionaryObject, NumberObject, NameObject, 
-                                TextStringObject, ArrayObject, FloatObject)
-except:
-    print("Chyba pri importovaní modulov reportlab a pypdf")
-    input('Stlač ENTER pre ukončenie!')
-
-# Font registration
-pdfmetrics.registerFont(TTFont('Arial', 'C:\\Windows\\Fonts\\arial.ttf'))
-pdfmetrics.registerFont(TTFont('ArialBold', 'C:\\Windows\\Fonts\\arialbd.ttf'))
+# reportlab and pypdf are imported on first use by _import_pdf_modules()
+canvas = A4 = colors = pdfmetrics = TTFont = pdfdoc = None
+PdfReader = PdfWriter = None
+DictionaryObject = NumberObject = NameObject = TextStringObject = ArrayObject = FloatObject = None
+IndirectObject = DecodedStreamObject = None
+
+# Millimeter in points (same as reportlab.lib.units.mm)
+mm = 72.0 / 2.54 * 0.1
+
+def _import_pdf_modules():
+    """
+    Imports reportlab and pypdf on first use.
+
+    Startup and commands which do not build PDF (e.g. rebuild-index) do not
+    pay for loading these modules.
+    """
+    global canvas, A4, colors, pdfmetrics, TTFont, pdfdoc
+    global PdfReader, PdfWriter
+    global DictionaryObject, NumberObject, NameObject, TextStringObject, ArrayObject, FloatObject
+    global IndirectObject, DecodedStreamObject
+
+    if PdfWriter is not None:
+        return
+
+    try:
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib import colors
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.pdfbase import pdfdoc
+
+        from pypdf import PdfReader, PdfWriter
+        from pypdf.generic import (DictionaryObject, NumberObject, NameObject, 
+                                    TextStringObject, ArrayObject, FloatObject,
+                                    IndirectObject, DecodedStreamObject)
+    except ImportError:
+        print("Chyba pri importovaní modulov reportlab a pypdf")
+        raise
+
+class FontProvider:
+    """
+    Registers fonts used in protocol lazily, on first use.
+
+    Font files are looked up in explicitly configured paths, in directory from
+    TMU_FONT_DIR environment variable, in "fonts" directory bundled next to
+    the script (or inside frozen executable) and in system font directories.
+    If Arial is not available (e.g. on Linux), metric compatible Liberation
+    Sans is used. DejaVu Sans is the last fallback - its glyphs are wider, so
+    text wrapping and layout differ and a warning is printed when it is used.
+    """
+    # Font name -> candidate file names in order of preference
+    FONT_FILES = {
+        "Arial": ["arial.ttf", "Arial.ttf", "LiberationSans-Regular.ttf", "DejaVuSans.ttf"],
+        "ArialBold": ["arialbd.ttf", "Arial Bold.ttf", "LiberationSans-Bold.ttf", "DejaVuSans-Bold.ttf"]
+    }
+
+    # Fallback files whose metrics differ from Arial
+    NOT_METRIC_COMPATIBLE = {"DejaVuSans.ttf", "DejaVuSans-Bold.ttf"}
+
+    # System font directories
+    SYSTEM_DIRS = [
+        os.path.join(os.environ.get("WINDIR", "C:\\Windows"), "Fonts"),
+        "/usr/share/fonts/truetype/msttcorefonts",
+        "/usr/share/fonts/truetype/liberation",
+        "/usr/share/fonts/liberation-sans",
+        "/usr/share/fonts/truetype/dejavu",
+        "/usr/share/fonts/TTF",
+        "/Library/Fonts",
+        "/System/Library/Fonts/Supplemental"
+    ]
+
+    def __init__(self, font_files=None):
+        """
+        Initialize FontProvider.
+
+        Args:
+            font_files (dict): Font name -> path of TTF file overriding lookup
+        """
+        self.font_files = dict(font_files or {})
+        self.registered = False
+
+    def _font_dirs(self):
+        """Return directories searched for font files in order of preference."""
+        dirs = []
+        if os.environ.get("TMU_FONT_DIR"):
+            dirs.append(os.environ["TMU_FONT_DIR"])
+
+        base_dir = getattr(sys, "_MEIPASS", os.path.dirname(os.path.abspath(__file__)))
+        dirs.append(os.path.join(base_dir, "fonts"))
+
+        return dirs + self.SYSTEM_DIRS
+
+    def find_font_file(self, name):
+        """
+        Find TTF file for font.
+
+        Args:
+            name (str): Font name (Arial, ArialBold)
+
+        Returns:
+            str: Path to font file
+        """
+        if name in self.font_files:
+            return self.font_files[name]
+
+        for directory in self._font_dirs():
+            for filename in self.FONT_FILES[name]:
+                full_path = os.path.join(directory, filename)
+                if os.path.isfile(full_path):
+                    return full_path
+
+        raise FileNotFoundError(f"Nenašiel sa súbor písma {name} ({', '.join(self.FONT_FILES[name])})")
+
+    def register(self):
+        """Register all fonts with reportlab, only on first call."""
+        if self.registered:
+            return
+
+        _import_pdf_modules()
+        for name in self.FONT_FILES:
+            font_file = self.find_font_file(name)
+            if os.path.basename(font_file) in self.NOT_METRIC_COMPATIBLE:
+                print(f"Upozornenie: písmo {name} nahradené súborom {font_file}, ktorý má širšie znaky - "
+                      f"zalomenie textov a rozloženie protokolu sa líši (nastav --font-dir alebo TMU_FONT_DIR)")
+            pdfmetrics.registerFont(TTFont(name, font_file))
+        self.registered = True
+
+# Font registration (done lazily when the first text is drawn)
+fonts = FontProvider()
+
+class StageProfiler:
+    """
+    Measures time spent in stages of protocol pipeline.
+
+    Stages are marked by context manager stage(name) or decorator timed(name).
+    Nested stages are recorded under path of enclosing stages of the same
+    thread (e.g. "create_pdf/test_pages"). Profiling is disabled by default,
+    disabled stages cost only one attribute check.
+
+    Settings are read from environment, so worker processes inherit them:
+        TMU_PROFILE          - record stages and print table at the end
+        TMU_PROFILE_TRACE    - write trace (JSON, Chrome trace format) to this file
+        TMU_PROFILE_CPROFILE - profile whole run by cProfile, write stats to this file
+        TMU_PROFILE_MEMORY   - trace memory allocated in stages by tracemalloc
+    """
+    def __init__(self):
+        self.enabled = bool(os.environ.get("TMU_PROFILE"))
+        self.trace_file = None
+        self.cprofile_file = None
+        self.trace_memory = False
+        self._cprofile = None
+        # (name, pid, thread id, start (s), duration (s), allocated memory (B) or None)
+        self._events = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._start = time.perf_counter()
+
+        # Forked worker process records only its own stages
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_in_child)
+
+    def _reset_in_child(self):
+        self._events = []
+        self._lock = threading.Lock()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile = None
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.stop()
+            self.trace_memory = False
+
+    def configure(self):
+        """Read settings from environment and start cProfile and tracemalloc if requested."""
+        self.trace_file = os.environ.get("TMU_PROFILE_TRACE") or None
+        self.cprofile_file = os.environ.get("TMU_PROFILE_CPROFILE") or None
+        self.trace_memory = bool(os.environ.get("TMU_PROFILE_MEMORY"))
+        self.enabled = bool(os.environ.get("TMU_PROFILE") or self.trace_file or self.cprofile_file
+                            or self.trace_memory)
+        if not self.enabled:
+            return
+
+        self._start = time.perf_counter()
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cprofile_file:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Context manager measuring one stage.
+
+        Args:
+            name (str): Stage name
+        """
+        if not self.enabled:
+            yield
+            return
+
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+        path = "/".join(stack)
+
+        memory_before = self._traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            memory_after = self._traced_memory()
+            memory = memory_after - memory_before if memory_before is not None else None
+            stack.pop()
+            with self._lock:
+                self._events.append((path, os.getpid(), threading.get_ident(), start - self._start, duration, memory))
+
+    def timed(self, name):
+        """
+        Decorator measuring every call of function as stage.
+
+        Args:
+            name (str): Stage name
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self.stage(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _traced_memory(self):
+        if not self.trace_memory:
+            return None
+        import tracemalloc
+        return tracemalloc.get_traced_memory()[0]
+
+    def collect(self):
+        """Return recorded events and clear them (used to pass events from worker process)."""
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def merge(self, events):
+        """Add events recorded in another process."""
+        with self._lock:
+            self._events.extend(events)
+
+    def summary(self):
+        """
+        Aggregate recorded events per stage.
+
+        Returns:
+            dict: Stage -> dict with Count, Total, Max (s) and Memory (B, None if not traced),
+                stages in order of their first start
+        """
+        stages = {}
+        for name, _, _, start, duration, memory in sorted(self._events, key=lambda event: event[3]):
+            stage = stages.setdefault(name, {"Count": 0, "Total": 0.0, "Max": 0.0, "Memory": None})
+            stage["Count"] += 1
+            stage["Total"] += duration
+            stage["Max"] = max(stage["Max"], duration)
+            if memory is not None:
+                stage["Memory"] = (stage["Memory"] or 0) + memory
+        return stages
+
+    def print_table(self):
+        """Print table of stages. Time of stages running in threads or processes is summed."""
+        elapsed = time.perf_counter() - self._start
+        print(f"\n{'Krok':<40} {'Počet':>7} {'Spolu [s]':>10} {'Priemer [ms]':>13} {'Max [ms]':>10} "
+              f"{'Podiel':>7} {'Pamäť [MB]':>11}")
+        for name, stage in self.summary().items():
+            memory = f"{stage['Memory'] / 2**20:11.2f}" if stage["Memory"] is not None else f"{'-':>11}"
+            share = stage["Total"] / elapsed * 100 if elapsed > 0 else 0.0
+            print(f"{name:<40} {stage['Count']:>7} {stage['Total']:>10.3f} "
+                  f"{stage['Total'] / stage['Count'] * 1000:>13.3f} {stage['Max'] * 1000:>10.3f} "
+                  f"{share:>6.1f}% {memory}")
+        print(f"{'Celkový čas':<40} {'':>7} {elapsed:>10.3f}")
+
+        if self.trace_memory:
+            import tracemalloc
+            print(f"Maximum alokovanej pamäte: {tracemalloc.get_traced_memory()[1] / 2**20:.2f} MB")
+
+    def write_trace(self, trace_file):
+        """
+        Write recorded stages to JSON file.
+
+        File is in Chrome trace event format (chrome://tracing, Perfetto),
+        aggregated stages are stored under "stages".
+
+        Args:
+            trace_file (str): Path to output file
+        """
+        trace = {
+            "traceEvents": [
+                {"name": name.rsplit("/", 1)[-1], "cat": name, "ph": "X", "pid": pid, "tid": thread,
+                 "ts": start * 1e6, "dur": duration * 1e6, "args": {"memory": memory}}
+                for name, pid, thread, start, duration, memory in self._events
+            ],
+            "stages": self.summary()
+        }
+        with open(trace_file, "w", encoding="utf-8") as f:
+            json.dump(trace, f, indent=1)
+
+    def report(self):
+        """Stop cProfile and tracemalloc, print table and write requested files."""
+        if not self.enabled:
+            return
+
+        if self._cprofile is not None:
+            import pstats
+
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_file)
+            stats = pstats.Stats(self._cprofile)
+            stats.sort_stats("cumulative").print_stats(20)
+            self._cprofile = None
+
+        self.print_table()
+        if self.trace_file:
+            self.write_trace(self.trace_file)
+            print(f"Záznam krokov uložený do {self.trace_file}")
+
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.stop()
+
+# Timing of pipeline stages (enabled by --profile or TMU_PROFILE)
+profiler = StageProfiler()
+
+@functools.lru_cache(maxsize=4096)
+def string_width(text, font, size):
+    """
+    Return width of text in points. Results are memoized per (text, font, size).
+
+    Args:
+        text (str): Measured text
+        font (str): Registered font name
+        size (float): Font size
+
+    Returns:
+        float: Width in points
+    """
+    return pdfmetrics.stringWidth(text, font, size)
+
+@functools.lru_cache(maxsize=1024)
+def wrap_text(text, font, size, max_width):
+    """
+    Split text into lines not wider than max_width. Results are memoized.
+
+    Args:
+        text (str): Text to wrap
+        font (str): Registered font name
+        size (float): Font size
+        max_width (float): Maximum line width in points
+
+    Returns:
+        tuple: Lines of text
+    """
+    space_width = string_width(" ", font, size)
+    lines = []
+    current_line = []
+    line_width = 0
+
+    for word in text.split():
+        word_width = string_width(word, font, size)
+        if line_width + word_width <= max_width:
+            current_line.append(word)
+            line_width += word_width + space_width
+        else:
+            if current_line:
+                lines.append(" ".join(current_line))
+            current_line = [word]
+            line_width = word_width + space_width
+
+    if current_line:
+        lines.append(" ".join(current_line))
+
+    return tuple(lines)
+
+# Default path to reports
+DEFAULT_REPORTS_PATH = "C:\\MIREL\\Reports_TUS"
+
+# Process steps of protocol: (ProductionProtocol attribute, question, default)
+OPERATIONS = [
+    ("input_check",             "Vstupná kontrola?",                    True),
+    ("additional_assembly",     "Doosadenie, úprava DPS?",              True),
+    ("cable_production",        "Elektrické prepojenia - výroba?",      False),
+    ("cable_check",             "Elektrické prepojenia - kontrola?",    False),
+    ("isolation_measurement",   "Meranie izolačných pevností?",         True),
+    ("programming",             "Programovanie a konfigurácia?",        True),
+    ("electrical_test",         "Elektrický test DPS?",                 True),
+    ("coating",                 "Lakovanie a UV kontrola DPS?",         True),
+    ("component_fixing",        "Fixácia komponentov na DPS?",          True),
+    ("structural_assembly",     "Montáž konštrukčných prvkov?",         False),
+    ("calibration",             "Kalibrácia?",                          False),
+    ("product_marking",         "Označenie polotovaru?",                True),
+    ("finishing_work",          "Ukončovacie práce?",                   True)
+]
 
 #####################################################################################################################
 def get_user_choice(prompt, default=False):
@@ -76,6 +476,36 @@ def get_display_name():
     GetUserNameEx(NameDisplay, nameBuffer, size)
     return nameBuffer.value
 
+def ask_directory(initialdir, title):
+    """
+    Opens dialog for selecting directory.
+
+    tkinter is imported only here, so headless commands never load it.
+
+    Args:
+        initialdir (str): Initial directory of dialog
+        title (str): Dialog title
+
+    Returns:
+        str: Selected directory (empty if dialog was cancelled)
+    """
+    import tkinter as tk
+    from tkinter import filedialog
+
+    # Setup file dialog
+    root = tk.Tk()
+    root.withdraw()
+    root.lift()
+    root.focus_force()
+
+    directory = filedialog.askdirectory(
+        parent=root,
+        initialdir=initialdir,
+        title=title
+    )
+    root.destroy()
+    return directory
+
 def open_file(filename):
         """Opens PDF file in default viewer."""
         try:
@@ -89,734 +519,3076 @@ def open_file(filename):
             print(f"Nepodarilo sa otviriť PDF súbor: {e}")
 
 #####################################################################################################################
-def add_text_label(pdf_file, text, position, page_number=0):
+def _create_text_annotation(x, y, title, text):
     """
-    Adds text label to PDF file.
+    Creates a /Text annotation dictionary.
 
     Args:
-        pdf_file (str): Path to PDF file
-        text (str): Text to add
-        page_number (int): Page number where to add text (0-based)
-        position (tuple): (x, y) coordinates for text position
+        x (float): X coordinate of annotation (pt)
+        y (float): Y coordinate of annotation (pt)
+        title (str): Annotation title
+        text (str): Annotation content
 
     Returns:
-        None
+        DictionaryObject: Annotation dictionary
     """
-    def create_text_page(text, position):
-        packet = io.BytesIO()
-        can = canvas.Canvas(packet, pagesize=letter)
-        
-        # Set font for diacritic support
-        can.setFont('Arial', 10)
-        
-        can.drawString(position[0], position[1], text)
-        can.save()
-        packet.seek(0)
-        return PdfReader(packet)
-
-    reader = PdfReader(pdf_file)
-    writer = PdfWriter()
-    
-    # Check if requested page exists
-    if page_number >= len(reader.pages):
-        raise ValueError(f"PDF has only {len(reader.pages)} pages, cannot add text to page {page_number + 1}")
-    
-    # Copy all pages
-    writer.append_pages_from_reader(reader)
-    
-    # Add text to specified page
-    page = writer.pages[page_number]
-    text_pdf = create_text_page(text, position)
-    page.merge_page(text_pdf.pages[0])
+    text_annotation = DictionaryObject()
+    text_annotation.update({
+        NameObject("/F"): NumberObject(4),
+        NameObject("/Type"): NameObject("/Annot"),
+        NameObject("/Subtype"): NameObject("/Text"),
+        NameObject("/T"): TextStringObject(title),
+        NameObject("/Contents"): TextStringObject(text),
+        NameObject("/Rect"): ArrayObject([
+            FloatObject(x),
+            FloatObject(y),
+            FloatObject(x + 20),
+            FloatObject(y + 20)
+        ]),
+        NameObject("/C"): ArrayObject([FloatObject(1), FloatObject(1), FloatObject(0.8)]),
+        NameObject("/Open"): NameObject("/true")
+    })
+    return text_annotation
 
-    # Save changes
-    with open(pdf_file, "wb") as fp:
-        writer.write(fp)
+class PageAnnotations:
+    """
+    Collects text annotations of document pages.
 
-def add_footer(pdf_file, protocol_number):
+    Annotations are kept as plain data, so any number of them can be gathered
+    (also in another process) and added to document in one pass by
+    PdfAssembler or StreamingPdfWriter.
     """
-    Adds page numbers and protocol number to PDF file footer.
+    # Positions of error comments on first page
+    UNFIXABLE_POSITION = (525, 607)
+    FIXABLE_POSITION = (525, 584)
 
-    Args:
-        pdf_file (str): Path to PDF file
-        protocol_number (str): Protocol number to be added
+    def __init__(self):
+        # Page number (0-based) -> list of (x, y, title, text)
+        self._pages = {}
 
-    Returns:
-        None
-    """
-    
-    reader = PdfReader(pdf_file)
-    total_pages = len(reader.pages)
-    
-    for page_num in range(total_pages):
-        # Add page numbers
-        page_num_text = f"{page_num + 1}/{total_pages}"
-        add_text_label(pdf_file, page_num_text, position=(535, 20), page_number=page_num)
-        
-        # Add protocol number
-        page_num_protocol = f"Číslo protokolu: {protocol_number}"  # Protocol number: could be translated if needed
-        add_text_label(pdf_file, page_num_protocol, position=(42, 20), page_number=page_num)
+    def __bool__(self):
+        return bool(self._pages)
 
-def add_comment_to_pdf(pdf_file, title, text_list, position):
-    """
-    Adds a comment (annotation) to PDF file.
+    def add(self, page_number, x, y, title, text):
+        """
+        Adds text annotation to page.
 
-    Args:
-        pdf_file (str): Path to PDF file
-        title (str): Comment title
-        text_list (list): List of text lines to be added in comment
-        position (tuple): (x, y) coordinates for comment position
+        Args:
+            page_number (int): Page number (0-based)
+            x (float): X coordinate of annotation (pt)
+            y (float): Y coordinate of annotation (pt)
+            title (str): Annotation title
+            text (str): Annotation content
+        """
+        self._pages.setdefault(page_number, []).append((x, y, title, text))
 
-    Returns:
-        None
-    """
-    def create_text_annotation(x, y, title, text):
-        text_annotation = DictionaryObject()
-        text_annotation.update({
-            NameObject("/F"): NumberObject(4),
-            NameObject("/Type"): NameObject("/Annot"),
-            NameObject("/Subtype"): NameObject("/Text"),
-            NameObject("/T"): TextStringObject(title),
-            NameObject("/Contents"): TextStringObject(text),
-            NameObject("/Rect"): ArrayObject([
-                FloatObject(x),
-                FloatObject(y),
-                FloatObject(x + 20),
-                FloatObject(y + 20)
-            ]),
-            NameObject("/C"): ArrayObject([FloatObject(1), FloatObject(1), FloatObject(0.8)]),
-            NameObject("/Open"): NameObject("/true")
-        })
-        return text_annotation
+    def add_comment(self, title, text_list, position, page_number=0):
+        """
+        Adds comment listing text lines under title, empty list adds nothing.
 
-    reader = PdfReader(pdf_file)
-    writer = PdfWriter()
-    
-    if len(reader.pages) > 0:
-        # Kopírovanie všetkých strán
-        writer.append_pages_from_reader(reader)
-        page = writer.pages[0]
-        
+        Args:
+            title (str): Comment title
+            text_list (list): List of text lines to be added in comment
+            position (tuple): (x, y) coordinates for comment position
+            page_number (int): Page number (0-based)
+        """
         if text_list:
-            annotation = create_text_annotation(
-                x=position[0],
-                y=position[1],
-                title=title,
-                text=f"{title}:\n" + "\n".join(text_list)
-            )
-            if "/Annots" in page:
-                page["/Annots"].append(annotation)
-            else:
-                page[NameObject("/Annots")] = ArrayObject([annotation])
+            self.add(page_number, position[0], position[1], title, f"{title}:\n" + "\n".join(text_list))
+
+    def add_error_comments(self, fixable_errors, unfixable_errors):
+        """
+        Adds error comments to first page.
 
-    # Uloženie zmien
-    with open(pdf_file, "wb") as fp:
-        writer.write(fp)
+        Args:
+            fixable_errors (list): List of fixable errors
+            unfixable_errors (list): List of unfixable errors
+        """
+        self.add_comment("Neopraviteľné zmätky", unfixable_errors, self.UNFIXABLE_POSITION)
+        self.add_comment("Opraviteľné zmätky", fixable_errors, self.FIXABLE_POSITION)
+
+    def get(self, page_number):
+        """Return annotations of page as list of (x, y, title, text)."""
+        return self._pages.get(page_number, [])
+
+    def page_numbers(self):
+        """Return sorted numbers of pages with annotations."""
+        return sorted(self._pages)
+
+    def apply(self, page, page_number):
+        """
+        Appends annotations of page to its /Annots array.
+
+        Args:
+            page: pypdf page object
+            page_number (int): Number of page in document (0-based)
+        """
+        annotations = [_create_text_annotation(x, y, title, text) for x, y, title, text in self.get(page_number)]
+        if not annotations:
+            return
+        if "/Annots" in page:
+            page["/Annots"].extend(annotations)
+        else:
+            page[NameObject("/Annots")] = ArrayObject(annotations)
 
-def add_error_comments_to_pdf(pdf_file, fixable_errors, unfixable_errors):
+def _add_indirect_object(writer, obj):
     """
-    Adds error comments to PDF file.
+    Adds object to document of writer as indirect object.
+
+    pypdf (5.x, pinned in requirements.txt) has no public method for this,
+    its private _add_object is used only until PdfWriter.add_object exists.
 
     Args:
-        pdf_file (str): Path to PDF file
-        fixable_errors (list): List of fixable errors
-        unfixable_errors (list): List of unfixable errors
+        writer (PdfWriter): Target document
+        obj: PDF object (dictionary, array or stream)
 
     Returns:
-        None
+        IndirectObject: Reference to added object
     """
-    if unfixable_errors:
-        add_comment_to_pdf(
-            pdf_file,
-            "Neopraviteľné zmätky",
-            unfixable_errors,
-            (525, 607)
-        )
-    
-    if fixable_errors:
-        add_comment_to_pdf(
-            pdf_file,
-            "Opraviteľné zmätky",
-            fixable_errors,
-            (525, 584)
-        )
-    
-def add_attachments_to_pdf(pdf_file, attachment_list):
+    add_object = getattr(writer, "add_object", None) or writer._add_object
+    return add_object(obj)
+
+def _create_filespec(filename, file_entry):
     """
-    Adds files as attachments to PDF document.
+    Creates a /Filespec dictionary of embedded file.
 
     Args:
-        pdf_file (str): Path to PDF file
-        attachment_list (list): List of file paths to attach
+        filename (str): Name of attachment
+        file_entry (IndirectObject): Reference to /EmbeddedFile stream
 
     Returns:
-        None
+        DictionaryObject: File specification dictionary
     """
+    filespec = DictionaryObject()
+    filespec.update({
+        NameObject("/Type"): NameObject("/Filespec"),
+        NameObject("/F"): TextStringObject(filename),
+        NameObject("/UF"): TextStringObject(filename),
+        NameObject("/EF"): DictionaryObject({NameObject("/F"): file_entry})
+    })
+    return filespec
 
-    reader = PdfReader(pdf_file)
-    writer = PdfWriter()
-    writer.append_pages_from_reader(reader)
+def _create_embedded_files_tree(entries):
+    """
+    Creates /EmbeddedFiles name tree.
 
-    for attachment in attachment_list:
-        if os.path.exists(attachment):
-            with open(attachment, "rb") as file:
-                writer.add_attachment(attachment, file.read())
+    Args:
+        entries (list): (filename, filespec) pairs, filespec is dictionary or reference
 
-    with open(pdf_file, "wb") as output_file:
-        writer.write(output_file)
+    Returns:
+        DictionaryObject: Name tree with names sorted as required by PDF specification
+    """
+    names = ArrayObject()
+    for filename, filespec in sorted(entries, key=lambda entry: entry[0]):
+        names.append(TextStringObject(filename))
+        names.append(filespec)
+    return DictionaryObject({NameObject("/Names"): names})
 
-#####################################################################################################################
-#####################################################################################################################
-class Colors(Enum):
-    DEFAULT = None
-    WHITE = colors.white
-    GREY = colors.Color(0.9, 0.9, 0.9)      # light grey
-    RED = colors.red
-    LIGHT_RED = colors.Color(1, 0.8, 0.8)    # light red
-    GREEN = colors.green
-    LIGHT_GREEN = colors.Color(0.8, 1, 0.8)  # light green
-    BLUE = colors.blue
-    LIGHT_BLUE = colors.Color(0.9, 0.9, 1)   # light blue
+class AttachmentPacker:
+    """
+    Prepares report files for embedding into protocol.
 
-#####################################################################################################################
-#####################################################################################################################
-class ProductionProtocol:
-    def __init__(self, 
-                 protocol_number=0,
-                 product_code="XXXX.Y.Z",
-                 min_pn=0,
-                 max_pn=0,
-                 unrepairable_count=0,
-                 repairable_count=0,
-                 production_doc="XXXXYYYY_YYMMDD",
-                 worker_name="XXXX",
-                 check_date="",
-                 note="",
-                 tests=None):
-        
-        # Basic data
-        self.protocol_number = protocol_number
-        self.product_code = product_code
-        self.min_pn = min_pn
-        self.max_pn = max_pn
-        self.total_count = max_pn - min_pn + 1
-        self.unrepairable_count = unrepairable_count
-        self.repairable_count = repairable_count
-        self.ok_count = self.total_count - unrepairable_count - repairable_count
-        self.production_doc = production_doc
-        self.worker_name = worker_name
-        self.check_date = check_date
-        self.note = note
+    Files are read in chunks. In mode "files" every file becomes separate
+    Flate-compressed embedded file and files with identical content share one
+    stream. Modes "zip" and "tar.xz" bundle all files into single attachment,
+    which is built in temporary file and copied into output in chunks by
+    StreamingPdfWriter (PdfAssembler keeps whole document in memory, so there
+    the bundle is in memory too). Identical files are stored once in "files"
+    (shared stream) and "tar.xz" (hard links); zip has no portable way to
+    link entries, so "zip" stores every copy. Attachment names are relative
+    to common directory of attached files and are unique.
+    """
+    FILES = "files"
+    ZIP = "zip"
+    TAR_XZ = "tar.xz"
+    MODES = (FILES, ZIP, TAR_XZ)
 
-        # Process steps
-        self.input_check = False
-        self.additional_assembly = False
-        self.cable_production = False
-        self.cable_check = False
-        self.isolation_measurement = False
-        self.programming = False
-        self.electrical_test = False
-        self.coating = False
-        self.component_fixing = False
-        self.structural_assembly = False
-        self.calibration = False
-        self.product_marking = False
-        self.finishing_work = False
+    CHUNK_SIZE = 1 << 16
+    # Bundles larger than this are spooled to temporary file
+    SPOOL_SIZE = 16 * 1024 * 1024
 
-        self.display_all_reports = False
+    def __init__(self, mode=FILES, bundle_name="Reports"):
+        """
+        Initialize AttachmentPacker.
 
-        # Test processing
-        if tests is not None:
-            self.reports = tests
-            self.test_names = list(next(iter(self.reports.values())).keys())
-        else:
-            self.reports = {}
-            self.test_names = []
-        
-        # Layout settings
-        self.left_margin = 15
-        self.left_margin_inside = self.left_margin + 2
-        self.row_index_max = 280
-        self.row_index = self.row_index_max
-        self.background_color = Colors.WHITE
+        Args:
+            mode (str): One of MODES
+            bundle_name (str): Name of bundle attachment without extension
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Neznámy spôsob pribalenia príloh: {mode}")
+        self.mode = mode
+        self.bundle_name = bundle_name
 
-    #################################################################################################################
-    def _create_frame(self, c, x, y, width, height, line_width=0.8, background_color=Colors.DEFAULT):
+    @staticmethod
+    def relative_names(attachment_list):
         """
-        Create a frame with specified parameters.
+        Returns existing files with their attachment names.
 
         Args:
-            c: Canvas object
-            x (float): Left top corner X coordinate (mm)
-            y (float): Left top corner Y coordinate (mm)
-            width (float): Frame width (mm)
-            height (float): Frame height (mm)
-            line_width (float): Frame line width (mm)
-            background_color (Colors): Background color from Colors enum
+            attachment_list (list): List of file paths
+
+        Returns:
+            list: (path, name) pairs, files listed more than once are returned once
         """
-        # Draw background if color specified
-        if background_color and background_color.value:
-            c.setFillColor(background_color.value)
-            c.rect(x*mm, (y-height)*mm, width*mm, height*mm, fill=1, stroke=0)
-    
-        # Draw frame
-        c.setStrokeColor(colors.black)
-        c.setFillColor(colors.black)
-        c.setLineWidth(line_width)
-        c.rect(x*mm, (y-height)*mm, width*mm, height*mm, fill=0)
+        paths = list(dict.fromkeys(os.path.abspath(path) for path in attachment_list if os.path.exists(path)))
+        if not paths:
+            return []
+        try:
+            base = os.path.commonpath([os.path.dirname(path) for path in paths])
+            names = [os.path.relpath(path, base).replace(os.sep, "/") for path in paths]
+        except ValueError:
+            # Files on different drives have no common directory
+            names = [os.path.basename(path) for path in paths]
+        return list(zip(paths, AttachmentPacker._unique_names(names)))
 
-    def _create_interactive_frame(self, c, x, y, width, height, line_width=0.8, field_name="text_field", tooltip='Insert Value', background_color=Colors.DEFAULT):
+    @staticmethod
+    def _unique_names(names):
         """
-        Create an interactive text field frame with specified parameters.
+        Returns names with numeric suffix added to repeated ones (report.json, report_2.json).
 
         Args:
-            c: Canvas object
-            x (float): Left top corner X coordinate (mm)
-            y (float): Left top corner Y coordinate (mm)
-            width (float): Frame width (mm)
-            height (float): Frame height (mm)
-            line_width (float): Frame line width (mm)
-            field_name (str): Unique identifier for the form field
-            tooltip (str): Hover text for the field
-            background_color (Colors): Background color from Colors enum
+            names (list): Attachment names
+
+        Returns:
+            list: Unique names in the same order
         """
-        # Create interactive form field
-        form = c.acroForm
-        form.textfield(
-            name=field_name,
-            tooltip=tooltip,
-            x=x*mm,
-            y=(y-height)*mm,
-            width=width*mm,
-            height=height*mm,
-            borderWidth=line_width,
-            borderColor=colors.black,
-            fillColor=background_color.value if background_color else colors.white,
-            textColor=colors.black,
-            fontSize=10
-        )
-        
-        # Draw frame
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(line_width)
-        c.rect(x*mm, (y-height)*mm, width*mm, height*mm, fill=0)
+        used = set(names)
+        seen = set()
+        result = []
+        for name in names:
+            unique = name
+            if name in seen:
+                stem, extension = os.path.splitext(name)
+                number = 2
+                while f"{stem}_{number}{extension}" in used:
+                    number += 1
+                unique = f"{stem}_{number}{extension}"
+                used.add(unique)
+            seen.add(name)
+            result.append(unique)
+        return result
 
-    def _write_text(self, c, text, x, y, bold=False, size=9, max_width=None, line_spacing=4):
+    def _read_chunks(self, path):
+        with open(path, "rb") as file:
+            for chunk in iter(functools.partial(file.read, self.CHUNK_SIZE), b""):
+                yield chunk
+
+    def _compress_file(self, path):
+        """Returns (SHA-256 digest, size, Flate-compressed content) of file."""
+        compressor = zlib.compressobj(9)
+        digest = hashlib.sha256()
+        size = 0
+        parts = []
+        for chunk in self._read_chunks(path):
+            digest.update(chunk)
+            size += len(chunk)
+            parts.append(compressor.compress(chunk))
+        parts.append(compressor.flush())
+        return digest.hexdigest(), size, b"".join(parts)
+
+    def _file_digest(self, path):
+        digest = hashlib.sha256()
+        for chunk in self._read_chunks(path):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def embedded_file_entries(size, compressed):
         """
-        Write text at specified position with formatting.
+        Returns dictionary entries of /EmbeddedFile stream.
 
         Args:
-            c: Canvas object
-            text (str): Text to write
-            x (float): X coordinate (mm)
-            y (float): Y coordinate (mm)
-            bold (bool): Whether text should be bold
-            size (int): Font size
-            max_width (float): Maximum text width in mm (None for no wrap)
-            line_spacing (float): Space between lines in mm
+            size (int): Size of attached file (B)
+            compressed (bool): Stream data is Flate-compressed
 
         Returns:
-            float: Y position of last line
+            DictionaryObject: Entries without /Length
         """
-        font = "ArialBold" if bold else "Arial"
-        c.setFont(font, size)
-        
-        if max_width is None:
-            # Single line
-            c.drawString(x*mm, y*mm, text)
-            return y
-        else:
-            # Text wrapping
-            max_width_pt = max_width * mm * 72 / 25.4
-            words = text.split()
-            lines = []
-            current_line = []
-            line_width = 0
-            
-            for word in words:
-                word_width = c.stringWidth(word, font, size)
-                if line_width + word_width <= max_width_pt:
-                    current_line.append(word)
-                    line_width += word_width + c.stringWidth(" ", font, size)
+        entries = DictionaryObject()
+        entries[NameObject("/Type")] = NameObject("/EmbeddedFile")
+        entries[NameObject("/Params")] = DictionaryObject({NameObject("/Size"): NumberObject(size)})
+        if compressed:
+            entries[NameObject("/Filter")] = NameObject("/FlateDecode")
+        return entries
+
+    @classmethod
+    def _embedded_file(cls, data, size, compressed):
+        """Creates /EmbeddedFile stream, compressed data is stored as it is."""
+        file_entry = DecodedStreamObject()
+        file_entry.set_data(data)
+        file_entry.update(cls.embedded_file_entries(size, compressed))
+        return file_entry
+
+    def _write_zip(self, bundle, files):
+        import zipfile
+
+        with zipfile.ZipFile(bundle, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as archive:
+            for path, name in files:
+                archive.write(path, name)
+
+    def _write_tar_xz(self, bundle, files):
+        import tarfile
+
+        # Identical files are stored once, copies are hard links to first one
+        stored = {}
+        with tarfile.open(fileobj=bundle, mode="w:xz") as archive:
+            for path, name in files:
+                digest = self._file_digest(path)
+                info = archive.gettarinfo(path, arcname=name)
+                if digest in stored:
+                    info.type = tarfile.LNKTYPE
+                    info.linkname = stored[digest]
+                    info.size = 0
+                    archive.addfile(info)
                 else:
-                    if current_line:
-                        lines.append(" ".join(current_line))
-                    current_line = [word]
-                    line_width = word_width + c.stringWidth(" ", font, size)
-            
-            if current_line:
-                lines.append(" ".join(current_line))
-            
-            # Write lines
-            current_y = y
-            for line in lines:
-                c.drawString(x*mm, current_y*mm, line)
-                current_y -= line_spacing
-            
-            return current_y
+                    stored[digest] = name
+                    with open(path, "rb") as file:
+                        archive.addfile(info, file)
 
-    def _create_checkbox(self, c, x, y, size=4, checked=False):
+    @contextlib.contextmanager
+    def open_bundle(self, attachment_list):
         """
-        Create a checkbox.
+        Builds bundle with all files in temporary file.
 
         Args:
-            c: Canvas object
-            x (float): X coordinate (mm)
-            y (float): Y coordinate (mm)
-            size (float): Checkbox size (mm)
-            checked (bool): Whether checkbox is checked
-        """
-        # Thicker frame
-        c.setStrokeColor(colors.black)
-        c.setLineWidth(0.8)
-        c.rect(x*mm, y*mm, size*mm, size*mm)
-        
-        if checked:
-            # Thicker checkmark
-            c.setLineWidth(1.2)
-            
-            # Adjusted coordinates for more visible checkmark
-            c.line((x+0.8)*mm, (y+size/2)*mm,
-                (x+size/2)*mm, (y+0.8)*mm)
-            c.line((x+size/2)*mm, (y+0.8)*mm,
-                (x+size-0.8)*mm, (y+size-0.8)*mm)
+            attachment_list (list): List of file paths to attach
 
-    #################################################################################################################
-    def _create_header(self, c):
+        Yields:
+            tuple: (name, size, file object at start of bundle) or None without files to attach
         """
-        Create header section of the first page.
-        
-        Args:
-            c: Canvas object
+        import tempfile
+
+        files = self.relative_names(attachment_list)
+        if not files:
+            yield None
+            return
+
+        with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE) as bundle:
+            if self.mode == self.ZIP:
+                self._write_zip(bundle, files)
+            else:
+                self._write_tar_xz(bundle, files)
+            size = bundle.tell()
+            bundle.seek(0)
+            yield f"{self.bundle_name}.{self.mode}", size, bundle
+
+    def embedded_files(self, attachment_list):
         """
-        # SIEMENS logo
-        self._write_text(c, "SIEMENS", self.left_margin, self.row_index, bold=True, size=20)
-        self.row_index -= 10
+        Yields embedded files for attachments, one file at a time.
 
-        # Document title above frame
-        self._write_text(c, "Generované pomocou TMU_ProtocolGenerator.py", self.left_margin, self.row_index, bold=True, size=12)
-        self.row_index -= 5
+        Args:
+            attachment_list (list): List of file paths to attach
 
-        # Main frame
-        self._create_frame(c, self.left_margin, self.row_index, 180, 113, 1.5, background_color=self.background_color)
-        self.row_index -= 7
-        
-        # Section title in frame
-        self._write_text(c, "A1: Hlavička", self.left_margin_inside, self.row_index, bold=True, size=12)
-        self.row_index -= 10
+        Yields:
+            tuple: (name, digest, stream) - stream is None if content with same
+            digest was yielded before and its stream should be reused
+        """
+        if self.mode != self.FILES:
+            # Stream object holds its data, so bundle is read into memory here
+            with self.open_bundle(attachment_list) as bundle:
+                if bundle is not None:
+                    name, size, file = bundle
+                    data = file.read()
+                    yield name, hashlib.sha256(data).hexdigest(), self._embedded_file(data, size, compressed=False)
+            return
 
-        # Header data
-        data = [
-            ["Číslo protokolu:",                      self.protocol_number],
-            ["Kód produktu:",                         self.product_code],
-            ["Rozsah výrobných čísel:",               f"V{self.min_pn:>06} - V{self.max_pn:>06}"],
-            ["Počet - zadané do výroby:",             str(self.total_count)],
-            ["Počet - zmätky neopraviteľné / PNR:",   str(self.unrepairable_count)],
-            ["Počet - zmätky opraviteľné / PNR:",     str(self.repairable_count)],
-            ["Počet - vyrobené OK:",                  str(self.ok_count)],
-            ["Výrobná dokumentácia:",                 self.production_doc],
-            ["Dátum kontroly:",                       self.check_date],
-            ["Meno pracovníka:",                      self.worker_name],
-            ["Poznámka:",                             self.note]
-        ]
+        seen = set()
+        files = self.relative_names(attachment_list)
+        for path, name in files:
+            digest, size, data = self._compress_file(path)
+            if digest in seen:
+                yield name, digest, None
+            else:
+                seen.add(digest)
+                yield name, digest, self._embedded_file(data, size, compressed=True)
 
-        # Draw data
-        for i, (text, value) in enumerate(data):
-            # Item text
-            self._write_text(c, text, self.left_margin_inside, self.row_index, size=10)
-            
-            # Value frame
-            if i == 4:  # Two frames in row for defect counts - unrepairable
-                self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
-                if self.unrepairable_count:
-                    self._create_interactive_frame(c, 90+65, self.row_index+5, 30, 7, 0.5, f'input_field_{i}', "Číslo PNR", background_color=Colors.LIGHT_BLUE)
-                if value:
-                    self._write_text(c, value, 93, self.row_index, size=10)
-            elif i == 5: # Two frames in row for defect counts - repairable
-                self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
-                if self.repairable_count:
-                    self._create_interactive_frame(c, 90+65, self.row_index+5, 30, 7, 0.5, f'input_field_{i}', "Číslo PNR", background_color=Colors.LIGHT_BLUE)
-                if value:
-                    self._write_text(c, value, 93, self.row_index, size=10)
-            elif i == 9:  # Worker name - longer frame
-                self._create_frame(c, 90, self.row_index+5, 95, 7, 0.5, background_color=Colors.LIGHT_BLUE)
-                if value:
-                    self._write_text(c, value, 93, self.row_index, size=10)
-            elif i == 10:  # Note - longer frame
-                self._create_frame(c, 90, self.row_index+5, 95, 14, 0.5, background_color=Colors.LIGHT_BLUE)
-                if value:
-                    self._write_text(c, value, 93, self.row_index, size=10, max_width=32)
-            else:  # Standard items
-                self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
-                if value:
-                    self._write_text(c, value, 93, self.row_index, size=10)
-            
-            self.row_index -= 8
+class PdfAssembler:
+    """
+    Assembles the final protocol from canvas output in memory.
 
-    def _create_processing(self, c):
+    Comments and attachments are applied to a single PdfWriter and the
+    result is written to disk only once, instead of reopening and rewriting
+    the file after every post-processing step. Footer is drawn during canvas
+    rendering (ProductionProtocol.render_footer).
+    """
+    def __init__(self, source):
         """
-        Create processing section of the first page.
-        
+        Initialize PdfAssembler.
+
         Args:
-            c: Canvas object
+            source: Canvas output - file path, bytes or file-like object
         """
-        self.row_index -= 12
-        # Main frame
-        self._create_frame(c, self.left_margin, self.row_index, 180, 37, 1.5, background_color=self.background_color)
-        self.row_index -= 7
+        _import_pdf_modules()
 
-        # Section title
-        self._write_text(c, "A2: Spracovanie", self.left_margin_inside, self.row_index, bold=True, size=12)
-        self.row_index -= 13
-        
-        # Processing data
-        self._write_text(c, "Zaevidovanie do 006HMH HOW-zoznam:", self.left_margin_inside, self.row_index, size=10)
-        self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
-        self._create_interactive_frame(c, 90, self.row_index+5, 60, 7, 0.5, 'name', "Zadaj meno", background_color=Colors.LIGHT_BLUE)
-        self.row_index -= 8
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        elif hasattr(source, "seek"):
+            source.seek(0)
 
-        self._write_text(c, "Platnosť výstupnej kontroly:", self.left_margin_inside, self.row_index, size=10)
-        self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
-        self._create_interactive_frame(c, 90, self.row_index+5, 60, 7, 0.5, 'validity', "Zadaj dátum", background_color=Colors.LIGHT_BLUE)
-        self.row_index -= 8
+        self.writer = PdfWriter()
+        self.writer.append_pages_from_reader(PdfReader(source))
 
-    def _create_operations(self, c):
+    def get_page_count(self):
+        """Return number of pages in assembled document."""
+        return len(self.writer.pages)
+
+    @profiler.timed("comments")
+    def add_annotations(self, annotations):
         """
-        Create operations section of the first page.
-        
+        Adds collected annotations to their pages.
+
         Args:
-            c: Canvas object
+            annotations (PageAnnotations): Annotations to add, pages out of document are skipped
         """
-        self.row_index -= 5
-        # Main frame
-        self._create_frame(c, self.left_margin, self.row_index, 85, 95, 1.5, background_color=self.background_color)
-        self.row_index -= 7
+        for page_number in annotations.page_numbers():
+            if page_number < self.get_page_count():
+                annotations.apply(self.writer.pages[page_number], page_number)
 
-        # Section title
-        self._write_text(c, "B1: Evidencia blokov operácií", self.left_margin_inside, self.row_index, bold=True, size=12)
-        self.row_index -= 13
-        
-        # Operations data
-        operations = [
-            ["Vstupná kontrola:", self.input_check],
-            ["Doosadenie, úprava DPS:", self.additional_assembly],
-            ["Elektrické prepojenia - výroba:", self.cable_production],
-            ["Elektrické prepojenia - kontrola:", self.cable_check],
-            ["Meranie izolačných pevností:", self.isolation_measurement],
-            ["Programovanie a konfigurácia:", self.programming],
-            ["Elektrický test DPS:", self.electrical_test],
-            ["Lakovanie a UV kontrola DPS:", self.coating],
-            ["Fixácia komponentov na DPS:", self.component_fixing],
-            ["Montáž konštrukčných prvkov:", self.structural_assembly],
-            ["Kalibrácia:", self.calibration],
-            ["Označenie polotovaru:", self.product_marking],
-            ["Ukončovacie práce:", self.finishing_work]
-        ]
-        
-        # Draw operations
-        for text, value in operations:
-            self._write_text(c, text, self.left_margin_inside, self.row_index, size=10)
-            self._create_checkbox(c, 90, self.row_index, size=4, checked=value)
-            self.row_index -= 6
+    @profiler.timed("attachments")
+    def add_attachments(self, attachment_list, mode="files", bundle_name="Reports"):
+        """
+        Adds files as attachments to document.
 
-    def _create_signatures(self, c):
+        Args:
+            attachment_list (list): List of file paths to attach
+            mode (str): Compressed files or single bundle (AttachmentPacker.MODES)
+            bundle_name (str): Name of bundle attachment without extension
         """
-        Create operations section of the first page.
-        
+        entries = []
+        file_entries = {}
+        for name, digest, stream in AttachmentPacker(mode, bundle_name).embedded_files(attachment_list):
+            if stream is not None:
+                file_entries[digest] = _add_indirect_object(self.writer, stream)
+            entries.append((name, _add_indirect_object(self.writer, _create_filespec(name, file_entries[digest]))))
+        if not entries:
+            return
+
+        root = self.writer.root_object
+        if "/Names" not in root:
+            root[NameObject("/Names")] = _add_indirect_object(self.writer, DictionaryObject())
+        root["/Names"][NameObject("/EmbeddedFiles")] = _add_indirect_object(self.writer, _create_embedded_files_tree(entries))
+
+    @profiler.timed("write")
+    def write(self, pdf_file):
+        """
+        Writes assembled document to disk.
+
         Args:
-            c: Canvas object
+            pdf_file (str): Path to output PDF file
         """
-        self.row_index = 107
-        
-        # Main frame
-        x_pos = self.left_margin + 85 + 5
-        self._create_frame(c, x_pos, self.row_index, 90, 95, 1.5, background_color=self.background_color)
-        self.row_index -= 7
+        with open(pdf_file, "wb") as output_file:
+            self.writer.write(output_file)
 
-        # Section title
-        self._write_text(c, "Podpisy:", x_pos+2, self.row_index, bold=True, size=12)
-        self.row_index -= 13
+class StreamingPdfWriter:
+    """
+    Writes PDF document to output stream object by object.
 
-        # Section for A1
-        self._write_text(c, "A1:", x_pos+2, self.row_index, bold=False, size=10)
-        self.row_index -= 2
-        self._create_frame(c, x_pos+2, self.row_index, 60, 14, 0.5, background_color=Colors.LIGHT_BLUE)
-        self.row_index -= 20
+    Pages of source documents are appended one document at a time and every
+    copied object is written out immediately, so only the document being
+    appended is kept in memory. Page tree, catalog and cross-reference table
+    are written by close().
+    """
+    HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    # Object numbers reserved for catalog and page tree
+    CATALOG = 1
+    PAGES = 2
 
-        # Section for A2
-        self._write_text(c, "A2:", x_pos+2, self.row_index, bold=False, size=10)
-        self.row_index -= 2
-        self._create_frame(c, x_pos+2, self.row_index, 60, 14, 0.5, background_color=Colors.LIGHT_BLUE)
-        
-    def _create_first_page(self, c):
+    def __init__(self, stream):
         """
-        Creates the first page of the protocol by combining header, processing and operations sections.
-        
+        Initialize StreamingPdfWriter.
+
         Args:
-            c: Canvas object
+            stream: Binary file-like object opened for writing
         """
-        self._create_header(c)
+        _import_pdf_modules()
+
+        self.stream = stream
+        self._position = 0
+        # Offset of every written object, index is object number
+        self._offsets = array('Q', [0, 0, 0])
+        self._pages = []
+        self._embedded_files = []
+        self._write(self.HEADER)
+
+    def _write(self, data):
+        self.stream.write(data)
+        self._position += len(data)
+
+    def _reserve(self):
+        """Returns new object number, object must be written before close()."""
+        self._offsets.append(0)
+        return len(self._offsets) - 1
+
+    def _write_object(self, number, obj):
+        """Writes object under reserved number."""
+        buffer = io.BytesIO()
+        buffer.write(f"{number} 0 obj\n".encode("ascii"))
+        obj.write_to_stream(buffer)
+        buffer.write(b"\nendobj\n")
+        self._offsets[number] = self._position
+        self._write(buffer.getvalue())
+
+    def add_stream(self, entries, source, length):
+        """
+        Writes new stream object copying its data from file in chunks.
+
+        Args:
+            entries (DictionaryObject): Stream dictionary without /Length
+            source: Binary file object positioned at start of stream data
+            length (int): Number of bytes of stream data
+
+        Returns:
+            IndirectObject: Reference to written object
+        """
+        number = self._reserve()
+        header = io.BytesIO()
+        header.write(f"{number} 0 obj\n".encode("ascii"))
+        dictionary = DictionaryObject(entries)
+        dictionary[NameObject("/Length")] = NumberObject(length)
+        dictionary.write_to_stream(header)
+        header.write(b"\nstream\n")
+        self._offsets[number] = self._position
+        self._write(header.getvalue())
+
+        remaining = length
+        while remaining > 0:
+            chunk = source.read(min(AttachmentPacker.CHUNK_SIZE, remaining))
+            if not chunk:
+                raise ValueError("Zdroj prúdu je kratší ako jeho dĺžka")
+            self._write(chunk)
+            remaining -= len(chunk)
+        self._write(b"\nendstream\nendobj\n")
+        return IndirectObject(number, 0, None)
+
+    def add_object(self, obj):
+        """
+        Writes new object.
+
+        Args:
+            obj: PDF object
+
+        Returns:
+            IndirectObject: Reference to written object
+        """
+        number = self._reserve()
+        self._write_object(number, obj)
+        return IndirectObject(number, 0, None)
+
+    @profiler.timed("append_segment")
+    def append_pdf(self, source, annotations=None):
+        """
+        Appends all pages of PDF document.
+
+        Args:
+            source: File path or file-like object with PDF document
+            annotations (PageAnnotations): Annotations added to pages while they are copied,
+                page numbers are counted in output document
+        """
+        if hasattr(source, "seek"):
+            source.seek(0)
+        reader = PdfReader(source)
+        # Source object number -> object number in output
+        mapping = {}
+        pending = deque()
+
+        def copy_object(obj):
+            if isinstance(obj, IndirectObject):
+                number = mapping.get(obj.idnum)
+                if number is None:
+                    number = mapping[obj.idnum] = self._reserve()
+                    pending.append((obj, number))
+                return IndirectObject(number, 0, None)
+            if isinstance(obj, DictionaryObject):
+                # Stream objects keep their (encoded) data, only references are remapped
+                result = copy.copy(obj)
+                for key, value in obj.items():
+                    result[key] = copy_object(value)
+                return result
+            if isinstance(obj, ArrayObject):
+                return ArrayObject(copy_object(value) for value in obj)
+            return obj
+
+        # Pages are numbered first, so references to them (e.g. from annotations) stay valid
+        # Object number of page -> page number in output document
+        page_numbers = {}
+        for page in reader.pages:
+            number = mapping[page.indirect_reference.idnum] = self._reserve()
+            page_numbers[number] = len(self._pages)
+            self._pages.append(number)
+            pending.append((page.indirect_reference, number))
+
+        while pending:
+            reference, number = pending.popleft()
+            obj = reference.get_object()
+            if number in page_numbers:
+                # Parent of page is page tree of output, not of source document
+                page = DictionaryObject()
+                for key, value in obj.items():
+                    if key != "/Parent":
+                        page[key] = copy_object(value)
+                page[NameObject("/Parent")] = IndirectObject(self.PAGES, 0, None)
+                if annotations:
+                    annotations.apply(page, page_numbers[number])
+                obj = page
+            else:
+                obj = copy_object(obj)
+            self._write_object(number, obj)
+
+    @profiler.timed("attachments")
+    def add_attachments(self, attachment_list, mode="files", bundle_name="Reports"):
+        """
+        Adds files as attachments to document.
+
+        Every embedded file is written out as soon as it is compressed, so
+        only one file is kept in memory at a time. Bundle is copied from its
+        temporary file in chunks.
+
+        Args:
+            attachment_list (list): List of file paths to attach
+            mode (str): Compressed files or single bundle (AttachmentPacker.MODES)
+            bundle_name (str): Name of bundle attachment without extension
+        """
+        packer = AttachmentPacker(mode, bundle_name)
+        if mode != AttachmentPacker.FILES:
+            with packer.open_bundle(attachment_list) as bundle:
+                if bundle is not None:
+                    name, size, file = bundle
+                    file_entry = self.add_stream(packer.embedded_file_entries(size, compressed=False), file, size)
+                    self._embedded_files.append((name, self.add_object(_create_filespec(name, file_entry))))
+            return
+
+        file_entries = {}
+        for name, digest, stream in packer.embedded_files(attachment_list):
+            if stream is not None:
+                file_entries[digest] = self.add_object(stream)
+            self._embedded_files.append((name, self.add_object(_create_filespec(name, file_entries[digest]))))
+
+    @profiler.timed("write")
+    def close(self):
+        """Writes page tree, catalog, cross-reference table and trailer."""
+        pages = DictionaryObject()
+        pages[NameObject("/Type")] = NameObject("/Pages")
+        pages[NameObject("/Count")] = NumberObject(len(self._pages))
+        pages[NameObject("/Kids")] = ArrayObject(IndirectObject(number, 0, None) for number in self._pages)
+        self._write_object(self.PAGES, pages)
+
+        catalog = DictionaryObject()
+        catalog[NameObject("/Type")] = NameObject("/Catalog")
+        catalog[NameObject("/Pages")] = IndirectObject(self.PAGES, 0, None)
+        if self._embedded_files:
+            embedded_files = _create_embedded_files_tree(self._embedded_files)
+            catalog[NameObject("/Names")] = DictionaryObject(
+                {NameObject("/EmbeddedFiles"): self.add_object(embedded_files)})
+        self._write_object(self.CATALOG, catalog)
+
+        xref_position = self._position
+        lines = [f"xref\n0 {len(self._offsets)}\n0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self._offsets[1:])
+        self._write("".join(lines).encode("ascii"))
+
+        trailer = DictionaryObject()
+        trailer[NameObject("/Size")] = NumberObject(len(self._offsets))
+        trailer[NameObject("/Root")] = IndirectObject(self.CATALOG, 0, None)
+        buffer = io.BytesIO()
+        buffer.write(b"trailer\n")
+        trailer.write_to_stream(buffer)
+        buffer.write(f"\nstartxref\n{xref_position}\n%%EOF\n".encode("ascii"))
+        self._write(buffer.getvalue())
+
+#####################################################################################################################
+#####################################################################################################################
+class Colors(Enum):
+    # RGB tuples, accepted by reportlab canvas without importing reportlab here
+    DEFAULT = None
+    WHITE = (1, 1, 1)
+    GREY = (0.9, 0.9, 0.9)          # light grey
+    RED = (1, 0, 0)
+    LIGHT_RED = (1, 0.8, 0.8)       # light red
+    GREEN = (0, 128 / 255, 0)
+    LIGHT_GREEN = (0.8, 1, 0.8)     # light green
+    BLUE = (0, 0, 1)
+    LIGHT_BLUE = (0.9, 0.9, 1)      # light blue
+
+#####################################################################################################################
+#####################################################################################################################
+# Marker of value missing in report (e.g. test without "Min")
+_MISSING = object()
+
+class _ValueColumn:
+    """
+    Array-backed column of JSON scalar values.
+
+    Numbers and booleans are stored in array of doubles together with their
+    kind, so they can be restored with the original type. Other values
+    (strings, lists, ...) are rare and kept in sparse dictionary.
+    """
+    __slots__ = ("values", "kinds", "others")
+
+    MISSING, NONE, INT, FLOAT, BOOL, OTHER = range(6)
+
+    def __init__(self):
+        self.values = array('d')
+        self.kinds = bytearray()
+        self.others = {}
+
+    def append(self, value):
+        """Append value (or _MISSING) at the end of column."""
+        if value is _MISSING:
+            kind, number = self.MISSING, 0.0
+        elif value is None:
+            kind, number = self.NONE, 0.0
+        elif isinstance(value, bool):
+            kind, number = self.BOOL, float(value)
+        elif isinstance(value, int) and abs(value) < 2 ** 53:
+            kind, number = self.INT, float(value)
+        elif isinstance(value, float):
+            kind, number = self.FLOAT, value
+        else:
+            kind, number = self.OTHER, 0.0
+            self.others[len(self.kinds)] = value
+
+        self.values.append(number)
+        self.kinds.append(kind)
+
+    def get(self, index):
+        """Return value with original type (_MISSING if value was not present)."""
+        kind = self.kinds[index]
+        if kind == self.FLOAT:
+            return self.values[index]
+        if kind == self.NONE:
+            return None
+        if kind == self.INT:
+            return int(self.values[index])
+        if kind == self.BOOL:
+            return bool(self.values[index])
+        if kind == self.OTHER:
+            return self.others[index]
+        return _MISSING
+
+    def is_number(self, index):
+        """Return True if value is int or float (bool included, as in isinstance check)."""
+        return self.kinds[index] in (self.INT, self.FLOAT, self.BOOL)
+
+    def numbers(self, start, step):
+        """
+        Return int and float values of strided slice of column (bool excluded).
+
+        Args:
+            start (int): First index
+            step (int): Step between indexes
+
+        Returns:
+            tuple: (list of positions in slice, sequence of values)
+        """
+        kinds = self.kinds[start::step]
+        values = self.values[start::step]
+        if kinds.count(self.INT) + kinds.count(self.FLOAT) == len(kinds):
+            # Only numbers - whole slice is used as is
+            return range(len(kinds)), values
+        positions = [i for i, kind in enumerate(kinds) if kind == self.INT or kind == self.FLOAT]
+        return positions, [values[i] for i in positions]
+
+    def __getstate__(self):
+        return (self.values, self.kinds, self.others)
+
+    def __setstate__(self, state):
+        self.values, self.kinds, self.others = state
+
+class ResultMatrix:
+    """
+    Columnar store of test results of all units.
+
+    Test metadata (name, code, unit) is interned once per test. Results are
+    kept in flat arrays indexed by cell = unit row * test count + test index:
+    passed and report flags as byte maps, ResultDesc/Min/Max as value columns.
+    Test order and units of a report which differ from the first report are
+    kept per unit, so every page group is rendered as before.
+    """
+    def __init__(self, test_names, codes, units):
+        """
+        Initialize ResultMatrix.
+
+        Args:
+            test_names (list): Test names in display order
+            codes (list): Test codes
+            units (list): Test units
+        """
+        self.test_names = list(test_names)
+        self.test_index = {name: i for i, name in enumerate(self.test_names)}
+        self.codes = list(codes)
+        self.units = list(units)
+        self.test_count = len(self.test_names)
+
+        # Per unit data
+        self.pns = []
+        self.unit_rows = {}
+        self.unit_info = []
+        self.unit_orders = []
+        self.unit_overrides = {}
+
+        # Per cell data
+        self.passed = bytearray()
+        self.report = bytearray()
+        self.results = _ValueColumn()
+        self.minimums = _ValueColumn()
+        self.maximums = _ValueColumn()
+
+    @classmethod
+    def from_tests(cls, tests):
+        """
+        Create empty matrix with test metadata taken from tests of one unit.
+
+        Args:
+            tests (dict): Test name -> test data (Code, Unit, ...)
+
+        Returns:
+            ResultMatrix: Empty matrix
+        """
+        return cls(
+            tests.keys(),
+            [sys.intern(str(test.get("Code", ""))) for test in tests.values()],
+            [sys.intern(str(test.get("Unit", "") or "")) for test in tests.values()]
+        )
+
+    @classmethod
+    def from_reports(cls, reports):
+        """
+        Create matrix from nested report dictionaries (JsonProcessor.reports format).
+
+        Args:
+            reports (dict): PN -> {"Tests": {name: test data}, "Passed", ...}
+
+        Returns:
+            ResultMatrix: Filled matrix
+        """
+        matrix = None
+        for pn, report in reports.items():
+            if matrix is None:
+                matrix = cls.from_tests(report["Tests"])
+            matrix.add_unit(pn, report["Tests"], report)
+        return matrix if matrix is not None else cls([], [], [])
+
+    def add_unit(self, pn, tests, info):
+        """
+        Append results of one unit.
+
+        Args:
+            pn (int): Production number
+            tests (dict): Test name -> test data with the same names as matrix
+            info (dict): Report data with Passed, AllTestsDone, UserName, CardTypeName
+        """
+        ordered = [tests[name] for name in self.test_names]
+
+        # Test order of this report, None when it matches the matrix order
+        order = None
+        if list(tests) != self.test_names:
+            order = array('H', (self.test_index[name] for name in tests))
+        self.unit_orders.append(order)
+
+        row = len(self.pns)
+        for i, test in enumerate(ordered):
+            unit = test.get("Unit", "") or ""
+            if unit != self.units[i]:
+                self.unit_overrides[self.cell(row, i)] = unit
+
+        self.unit_rows[pn] = row
+        self.pns.append(pn)
+        self.unit_info.append((
+            info.get("Passed"),
+            info.get("AllTestsDone"),
+            sys.intern(str(info.get("UserName", ""))),
+            sys.intern(str(info.get("CardTypeName", "")))
+        ))
+
+        for test in ordered:
+            self.passed.append(1 if test["Passed"] else 0)
+            self.report.append(1 if test["Report"] else 0)
+            self.results.append(test["ResultDesc"])
+            self.minimums.append(test.get("Min", _MISSING))
+            self.maximums.append(test.get("Max", _MISSING))
+
+    def get_row(self, pn):
+        """Return row index of unit with production number."""
+        return self.unit_rows[pn]
+
+    def cell(self, row, test):
+        """Return flat index of cell for unit row and test index."""
+        return row * self.test_count + test
+
+    def get_order(self, pn):
+        """Return test indexes in the order of the report of unit."""
+        order = self.unit_orders[self.unit_rows[pn]]
+        return list(order) if order is not None else list(range(self.test_count))
+
+    def get_unit(self, pn, test):
+        """Return unit of test as stated in the report of unit."""
+        return self.unit_overrides.get(self.cell(self.unit_rows[pn], test), self.units[test])
+
+    def get_test_data(self, pn, test):
+        """
+        Return test data of unit in the same form as JsonProcessor produced it.
+
+        Args:
+            pn (int): Production number
+            test (int): Test index
+
+        Returns:
+            dict: Code, Passed, Report, ResultDesc, Unit (Min, Max if present)
+        """
+        cell = self.cell(self.unit_rows[pn], test)
+        test_data = {
+            "Code": self.codes[test],
+            "Passed": bool(self.passed[cell]),
+            "Report": bool(self.report[cell]),
+            "ResultDesc": self.results.get(cell),
+            "Unit": self.unit_overrides.get(cell, self.units[test])
+        }
+
+        minimum = self.minimums.get(cell)
+        if minimum is not _MISSING:
+            test_data["Min"] = minimum
+        maximum = self.maximums.get(cell)
+        if maximum is not _MISSING:
+            test_data["Max"] = maximum
+
+        return test_data
+
+    def test_statistics(self, test):
+        """
+        Compute statistics of test over all units.
+
+        Columns are processed as strided slices of the flat arrays.
+
+        Args:
+            test (int): Test index
+
+        Returns:
+            dict: Passed, Failed (counts), Count (numeric results) and Min, Mean,
+                Max, Stdev of numeric ResultDesc (None without numeric results)
+        """
+        passed = self.passed[test::self.test_count]
+        passed_count = passed.count(1)
+        _, values = self.results.numbers(test, self.test_count)
+
+        statistics = {
+            "Passed": passed_count,
+            "Failed": len(passed) - passed_count,
+            "Count": len(values),
+            "Min": None,
+            "Mean": None,
+            "Max": None,
+            "Stdev": None
+        }
+        if values:
+            mean = math.fsum(values) / len(values)
+            statistics["Min"] = min(values)
+            statistics["Mean"] = mean
+            statistics["Max"] = max(values)
+            if len(values) > 1 and statistics["Min"] != statistics["Max"]:
+                statistics["Stdev"] = math.sqrt(math.fsum((value - mean) ** 2 for value in values) / (len(values) - 1))
+            else:
+                statistics["Stdev"] = 0.0
+        return statistics
+
+    def get_limits(self, pn, test):
+        """
+        Return numeric Min/Max limits of test from report of unit.
+
+        Args:
+            pn (int): Production number
+            test (int): Test index
+
+        Returns:
+            tuple: (Min, Max), None for limit which is missing or not a number
+        """
+        cell = self.cell(self.unit_rows[pn], test)
+        minimum = self.minimums.get(cell) if self.minimums.is_number(cell) else None
+        maximum = self.maximums.get(cell) if self.maximums.is_number(cell) else None
+        return minimum, maximum
+
+    def outlier_units(self, statistics, sigma):
+        """
+        Return units with failed test or numeric result outside of sigma band.
+
+        Args:
+            statistics (dict): Test index -> test_statistics() of tests to check
+            sigma (float): Width of band around mean in standard deviations
+
+        Returns:
+            list: Production numbers in unit order
+        """
+        n = self.test_count
+        rows = {row for row in range(len(self.pns)) if self.passed.find(0, row * n, (row + 1) * n) >= 0}
+
+        for test, test_statistics in statistics.items():
+            if not test_statistics["Stdev"]:
+                continue
+            low = test_statistics["Mean"] - sigma * test_statistics["Stdev"]
+            high = test_statistics["Mean"] + sigma * test_statistics["Stdev"]
+            positions, values = self.results.numbers(test, n)
+            rows.update(row for row, value in zip(positions, values) if value < low or value > high)
+
+        return [self.pns[row] for row in sorted(rows)]
+
+    def to_reports(self):
+        """Return results as nested dictionaries (JsonProcessor.reports format)."""
+        reports = {}
+        for row, pn in enumerate(self.pns):
+            passed, all_tests_done, user_name, card_type_name = self.unit_info[row]
+            reports[pn] = {
+                "Tests": {self.test_names[i]: self.get_test_data(pn, i) for i in self.get_order(pn)},
+                "Passed": passed,
+                "AllTestsDone": all_tests_done,
+                "UserName": user_name,
+                "CardTypeName": card_type_name
+            }
+        return reports
+
+#####################################################################################################################
+#####################################################################################################################
+class CellBatch:
+    """
+    Collects labels and result cells of a table and draws them at once.
+
+    Backgrounds are grouped by color into one path per color, all cell frames
+    form one stroked path and texts are written by text objects with font set
+    only when it changes. Drawing order of the original per-cell drawing is
+    kept: labels, backgrounds, frames, cell texts. Notes become annotations
+    of the page.
+    """
+    def __init__(self):
+        self.labels = []
+        self.backgrounds = {}
+        self.frames = []
+        self.texts = []
+        self.notes = []
+
+    def add_label(self, text, x, y, size):
+        """
+        Add text drawn below the cells (e.g. test name).
+
+        Args:
+            text (str): Text to write
+            x (float): X coordinate (mm)
+            y (float): Y coordinate (mm)
+            size (int): Font size
+        """
+        self.labels.append((x, y, size, text))
+
+    def add_cell(self, x, y, width, height, background_color, text, size):
+        """
+        Add cell with background, frame and text.
+
+        Args:
+            x (float): Left top corner X coordinate (mm)
+            y (float): Left top corner Y coordinate (mm)
+            width (float): Cell width (mm)
+            height (float): Cell height (mm)
+            background_color (Colors): Background color from Colors enum
+            text (tuple): (text, x (mm), y (mm)) written in the cell
+            size (int): Font size of text
+        """
+        rect = (x*mm, (y-height)*mm, width*mm, height*mm)
+        if background_color and background_color.value:
+            self.backgrounds.setdefault(background_color, []).append(rect)
+        self.frames.append(rect)
+        self.texts.append((text[1], text[2], size, text[0]))
+
+    def add_note(self, x, y, width, height, title, text):
+        """
+        Add note shown when mouse is over the cell.
+
+        Args:
+            x (float): Left top corner X coordinate (mm)
+            y (float): Left top corner Y coordinate (mm)
+            width (float): Cell width (mm)
+            height (float): Cell height (mm)
+            title (str): Note title
+            text (str): Note content
+        """
+        self.notes.append(((x*mm, (y-height)*mm, (x+width)*mm, y*mm), title, text))
+
+    def _draw_notes(self, c):
+        """
+        Add notes as invisible square annotations covering the cells.
+
+        /BS and /C are written into every note instead of being shared
+        indirect objects, because reportlab creates shared objects only
+        through private Canvas._doc.Reference. This costs about 35 bytes per
+        note (1000 notes: 201 kB instead of 166 kB).
+
+        Public canvas methods add only reportlab's own annotation types
+        (textAnnotation shows an icon), so notes are added through private
+        Canvas._addAnnotation - reportlab version is pinned in requirements.txt
+        and tests/test_pdf_output.py checks the notes in output.
+
+        Args:
+            c: Canvas object
+        """
+        for rect, title, text in self.notes:
+            c._addAnnotation(pdfdoc.PDFDictionary({
+                "Type": pdfdoc.PDFName("Annot"),
+                "Subtype": pdfdoc.PDFName("Square"),
+                "F": 4,
+                "Rect": pdfdoc.PDFArray(rect),
+                "BS": pdfdoc.PDFDictionary({"W": 0}),
+                "C": pdfdoc.PDFArray([1, 0.8, 0.8]),
+                "T": pdfdoc.PDFString(title),
+                "Contents": pdfdoc.PDFString(text)
+            }))
+
+    def _draw_texts(self, c, texts, font):
+        if not texts:
+            return
+        text_object = c.beginText()
+        current_size = None
+        for x, y, size, text in texts:
+            if size != current_size:
+                text_object.setFont(font, size)
+                current_size = size
+            text_object.setTextOrigin(x*mm, y*mm)
+            text_object.textOut(text)
+        c.drawText(text_object)
+
+    def draw(self, c, line_width=0.3, font="Arial"):
+        """
+        Draw collected content and clear the batch.
+
+        Args:
+            c: Canvas object
+            line_width (float): Line width of cell frames
+            font (str): Font name of texts
+        """
+        fonts.register()
+        c.saveState()
+
+        c.setFillColor(colors.black)
+        self._draw_texts(c, self.labels, font)
+
+        for color, rects in self.backgrounds.items():
+            c.setFillColor(color.value)
+            path = c.beginPath()
+            for rect in rects:
+                path.rect(*rect)
+            c.drawPath(path, fill=1, stroke=0)
+
+        if self.frames:
+            c.setStrokeColor(colors.black)
+            c.setLineWidth(line_width)
+            path = c.beginPath()
+            for rect in self.frames:
+                path.rect(*rect)
+            c.drawPath(path, fill=0, stroke=1)
+
+        c.setFillColor(colors.black)
+        self._draw_texts(c, self.texts, font)
+
+        c.restoreState()
+        self._draw_notes(c)
+        self.__init__()
+
+#####################################################################################################################
+#####################################################################################################################
+class ProtocolLayout:
+    """
+    Geometry of test pages.
+
+    Test name column and margins have fixed width, number of module columns
+    and test rows per page is computed from page size. One column and one row
+    are kept free at the right and bottom edge of the frame, which gives the
+    original 10 modules x 44 tests for A4 portrait.
+    """
+    # Page formats in portrait orientation (mm)
+    PAGE_FORMATS = {"A4": (210, 297), "A3": (297, 420)}
+    NAMES = ("A4", "A4-landscape", "A3", "A3-landscape")
+
+    def __init__(self, page_format="A4", landscape=False, test_column=65, pn_column=9, spacing=1,
+                 row_height=5, header_height=20, modules_per_page=None, tests_per_page=None):
+        """
+        Initialize ProtocolLayout.
+
+        Args:
+            page_format (str): Page format (A4, A3)
+            landscape (bool): Landscape orientation of test pages
+            test_column (float): Width of test name column (mm)
+            pn_column (float): Width of result column (mm)
+            spacing (float): Space between result columns (mm)
+            row_height (float): Height of test row (mm)
+            header_height (float): Height of header with vertical PN labels (mm)
+            modules_per_page (int): Modules per page (computed from page size if None)
+            tests_per_page (int): Tests per page (computed from page size if None)
+        """
+        width, height = self.PAGE_FORMATS[page_format]
+        if landscape:
+            width, height = height, width
+        self.page_width = width
+        self.page_height = height
+
+        # Page header and section frame
+        self.margin = 15
+        self.header_y = height - 17
+        self.frame_width = width - 2 * self.margin
+        self.frame_top = height - 32
+        self.frame_height = self.frame_top - 12
+        self.title_y = self.frame_top - 7
+
+        # Table
+        self.pn_column = pn_column
+        self.row_height = row_height
+        self.pn_y = self.title_y - 5 - header_height + 5
+        self.first_row_y = self.title_y - 5 - header_height
+        self.x_test = self.margin + 2
+        self.x_unit = self.x_test + test_column - 10
+        x_results_start = self.x_test + test_column
+        step = pn_column + spacing
+
+        frame_right = self.margin + self.frame_width
+        frame_bottom = self.frame_top - self.frame_height
+        self.modules_per_page = modules_per_page or int((frame_right - x_results_start) // step) - 1
+        self.tests_per_page = tests_per_page or int((self.first_row_y - frame_bottom - row_height) // row_height) + 1
+        self.x_results = [x_results_start + (i * step) for i in range(self.modules_per_page)]
+
+    @classmethod
+    def from_name(cls, name):
+        """
+        Create layout from name (A4, A4-landscape, A3, A3-landscape).
+
+        Args:
+            name (str): Layout name
+
+        Returns:
+            ProtocolLayout: Layout with computed modules and tests per page
+        """
+        if name not in cls.NAMES:
+            raise ValueError(f"Unknown layout: {name}")
+        page_format, _, orientation = name.partition("-")
+        return cls(page_format, landscape=orientation == "landscape")
+
+    @property
+    def page_size(self):
+        """Page size in points."""
+        return (self.page_width * mm, self.page_height * mm)
+
+#####################################################################################################################
+#####################################################################################################################
+class ProductionProtocol:
+    # Module groups with at least this many test pages share title and PN labels as form
+    GROUP_FORM_MIN_PAGES = 3
+
+    # Column labels of statistics table in summary mode
+    SUMMARY_LABELS = ("Vyhovelo", "Nevyhovelo", "Dolný limit", "Horný limit", "Minimum", "Priemer", "Maximum",
+                      "Odchýlka")
+
+    def __init__(self, 
+                 protocol_number=0,
+                 product_code="XXXX.Y.Z",
+                 min_pn=0,
+                 max_pn=0,
+                 unrepairable_count=0,
+                 repairable_count=0,
+                 production_doc="XXXXYYYY_YYMMDD",
+                 worker_name="XXXX",
+                 check_date="",
+                 note="",
+                 tests=None):
+        
+        # Basic data
+        self.protocol_number = protocol_number
+        self.product_code = product_code
+        self.min_pn = min_pn
+        self.max_pn = max_pn
+        self.total_count = max_pn - min_pn + 1
+        self.unrepairable_count = unrepairable_count
+        self.repairable_count = repairable_count
+        self.ok_count = self.total_count - unrepairable_count - repairable_count
+        self.production_doc = production_doc
+        self.worker_name = worker_name
+        self.check_date = check_date
+        self.note = note
+
+        # Process steps
+        self.input_check = False
+        self.additional_assembly = False
+        self.cable_production = False
+        self.cable_check = False
+        self.isolation_measurement = False
+        self.programming = False
+        self.electrical_test = False
+        self.coating = False
+        self.component_fixing = False
+        self.structural_assembly = False
+        self.calibration = False
+        self.product_marking = False
+        self.finishing_work = False
+
+        self.display_all_reports = False
+
+        # Draw footer (page number, protocol number) during rendering
+        self.render_footer = False
+
+        # Geometry of test pages
+        self.layout = ProtocolLayout()
+
+        # Summary mode - statistics per test, full results only for failed units and outliers
+        self.summary_mode = False
+        self.sigma_band = 3.0
+
+        # Failed result cells carry note with limits and measured value
+        self.failure_notes = True
+
+        # Test processing - results are read from columnar ResultMatrix
+        if isinstance(tests, ResultMatrix):
+            self.results = tests
+        elif tests:
+            self.results = ResultMatrix.from_reports(tests)
+        else:
+            self.results = ResultMatrix([], [], [])
+        self.test_names = self.results.test_names
+        
+        # Layout settings
+        self.left_margin = 15
+        self.left_margin_inside = self.left_margin + 2
+        self.row_index_max = 280
+        self.row_index = self.row_index_max
+        self.background_color = Colors.WHITE
+
+        # Footer numbering of segments rendered by create_pdf_segments
+        self._page_offset = 0
+        self._total_pages = None
+
+        # (font, size) set last on canvas by _set_font
+        self._font = None
+
+    #################################################################################################################
+    def _create_frame(self, c, x, y, width, height, line_width=0.8, background_color=Colors.DEFAULT):
+        """
+        Create a frame with specified parameters.
+
+        Args:
+            c: Canvas object
+            x (float): Left top corner X coordinate (mm)
+            y (float): Left top corner Y coordinate (mm)
+            width (float): Frame width (mm)
+            height (float): Frame height (mm)
+            line_width (float): Frame line width (mm)
+            background_color (Colors): Background color from Colors enum
+        """
+        # Draw background if color specified
+        if background_color and background_color.value:
+            c.setFillColor(background_color.value)
+            c.rect(x*mm, (y-height)*mm, width*mm, height*mm, fill=1, stroke=0)
+    
+        # Draw frame
+        c.setStrokeColor(colors.black)
+        c.setFillColor(colors.black)
+        c.setLineWidth(line_width)
+        c.rect(x*mm, (y-height)*mm, width*mm, height*mm, fill=0)
+
+    def _create_interactive_frame(self, c, x, y, width, height, line_width=0.8, field_name="text_field", tooltip='Insert Value', background_color=Colors.DEFAULT):
+        """
+        Create an interactive text field frame with specified parameters.
+
+        Args:
+            c: Canvas object
+            x (float): Left top corner X coordinate (mm)
+            y (float): Left top corner Y coordinate (mm)
+            width (float): Frame width (mm)
+            height (float): Frame height (mm)
+            line_width (float): Frame line width (mm)
+            field_name (str): Unique identifier for the form field
+            tooltip (str): Hover text for the field
+            background_color (Colors): Background color from Colors enum
+        """
+        fill_color = background_color.value if background_color else colors.white
+        if isinstance(fill_color, tuple):
+            fill_color = colors.Color(*fill_color)
+
+        # Create interactive form field
+        form = c.acroForm
+        form.textfield(
+            name=field_name,
+            tooltip=tooltip,
+            x=x*mm,
+            y=(y-height)*mm,
+            width=width*mm,
+            height=height*mm,
+            borderWidth=line_width,
+            borderColor=colors.black,
+            fillColor=fill_color,
+            textColor=colors.black,
+            fontSize=10
+        )
+        
+        # Draw frame
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(line_width)
+        c.rect(x*mm, (y-height)*mm, width*mm, height*mm, fill=0)
+
+    def _set_font(self, c, font, size):
+        """
+        Sets font of canvas only when it differs from the one set last.
+
+        Font is tracked in _font, which is reset wherever canvas resets its
+        graphics state (new canvas, new page, form).
+        """
+        if self._font != (font, size):
+            c.setFont(font, size)
+            self._font = (font, size)
+
+    def _write_text(self, c, text, x, y, bold=False, size=9, max_width=None, line_spacing=4):
+        """
+        Write text at specified position with formatting.
+
+        Args:
+            c: Canvas object
+            text (str): Text to write
+            x (float): X coordinate (mm)
+            y (float): Y coordinate (mm)
+            bold (bool): Whether text should be bold
+            size (int): Font size
+            max_width (float): Maximum text width in mm (None for no wrap)
+            line_spacing (float): Space between lines in mm
+
+        Returns:
+            float: Y position of last line
+        """
+        fonts.register()
+        font = "ArialBold" if bold else "Arial"
+        self._set_font(c, font, size)
+        
+        if max_width is None:
+            # Single line
+            c.drawString(x*mm, y*mm, text)
+            return y
+        else:
+            # Text wrapping (measured lines are cached)
+            max_width_pt = max_width * mm * 72 / 25.4
+            lines = wrap_text(text, font, size, max_width_pt)
+            
+            # Write lines
+            current_y = y
+            for line in lines:
+                c.drawString(x*mm, current_y*mm, line)
+                current_y -= line_spacing
+            
+            return current_y
+
+    def _create_checkbox(self, c, x, y, size=4, checked=False):
+        """
+        Create a checkbox.
+
+        Args:
+            c: Canvas object
+            x (float): X coordinate (mm)
+            y (float): Y coordinate (mm)
+            size (float): Checkbox size (mm)
+            checked (bool): Whether checkbox is checked
+        """
+        # Thicker frame
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(0.8)
+        c.rect(x*mm, y*mm, size*mm, size*mm)
+        
+        if checked:
+            # Thicker checkmark
+            c.setLineWidth(1.2)
+            
+            # Adjusted coordinates for more visible checkmark
+            c.line((x+0.8)*mm, (y+size/2)*mm,
+                (x+size/2)*mm, (y+0.8)*mm)
+            c.line((x+size/2)*mm, (y+0.8)*mm,
+                (x+size-0.8)*mm, (y+size-0.8)*mm)
+
+    #################################################################################################################
+    def _create_header(self, c):
+        """
+        Create header section of the first page.
+        
+        Args:
+            c: Canvas object
+        """
+        # SIEMENS logo
+        self._write_text(c, "SIEMENS", self.left_margin, self.row_index, bold=True, size=20)
+        self.row_index -= 10
+
+        # Document title above frame
+        self._write_text(c, "Generované pomocou TMU_ProtocolGenerator.py", self.left_margin, self.row_index, bold=True, size=12)
+        self.row_index -= 5
+
+        # Main frame
+        self._create_frame(c, self.left_margin, self.row_index, 180, 113, 1.5, background_color=self.background_color)
+        self.row_index -= 7
+        
+        # Section title in frame
+        self._write_text(c, "A1: Hlavička", self.left_margin_inside, self.row_index, bold=True, size=12)
+        self.row_index -= 10
+
+        # Header data
+        data = [
+            ["Číslo protokolu:",                      self.protocol_number],
+            ["Kód produktu:",                         self.product_code],
+            ["Rozsah výrobných čísel:",               f"V{self.min_pn:>06} - V{self.max_pn:>06}"],
+            ["Počet - zadané do výroby:",             str(self.total_count)],
+            ["Počet - zmätky neopraviteľné / PNR:",   str(self.unrepairable_count)],
+            ["Počet - zmätky opraviteľné / PNR:",     str(self.repairable_count)],
+            ["Počet - vyrobené OK:",                  str(self.ok_count)],
+            ["Výrobná dokumentácia:",                 self.production_doc],
+            ["Dátum kontroly:",                       self.check_date],
+            ["Meno pracovníka:",                      self.worker_name],
+            ["Poznámka:",                             self.note]
+        ]
+
+        # Draw data
+        for i, (text, value) in enumerate(data):
+            # Item text
+            self._write_text(c, text, self.left_margin_inside, self.row_index, size=10)
+            
+            # Value frame
+            if i == 4:  # Two frames in row for defect counts - unrepairable
+                self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
+                if self.unrepairable_count:
+                    self._create_interactive_frame(c, 90+65, self.row_index+5, 30, 7, 0.5, f'input_field_{i}', "Číslo PNR", background_color=Colors.LIGHT_BLUE)
+                if value:
+                    self._write_text(c, value, 93, self.row_index, size=10)
+            elif i == 5: # Two frames in row for defect counts - repairable
+                self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
+                if self.repairable_count:
+                    self._create_interactive_frame(c, 90+65, self.row_index+5, 30, 7, 0.5, f'input_field_{i}', "Číslo PNR", background_color=Colors.LIGHT_BLUE)
+                if value:
+                    self._write_text(c, value, 93, self.row_index, size=10)
+            elif i == 9:  # Worker name - longer frame
+                self._create_frame(c, 90, self.row_index+5, 95, 7, 0.5, background_color=Colors.LIGHT_BLUE)
+                if value:
+                    self._write_text(c, value, 93, self.row_index, size=10)
+            elif i == 10:  # Note - longer frame
+                self._create_frame(c, 90, self.row_index+5, 95, 14, 0.5, background_color=Colors.LIGHT_BLUE)
+                if value:
+                    self._write_text(c, value, 93, self.row_index, size=10, max_width=32)
+            else:  # Standard items
+                self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
+                if value:
+                    self._write_text(c, value, 93, self.row_index, size=10)
+            
+            self.row_index -= 8
+
+    def _create_processing(self, c):
+        """
+        Create processing section of the first page.
+        
+        Args:
+            c: Canvas object
+        """
+        self.row_index -= 12
+        # Main frame
+        self._create_frame(c, self.left_margin, self.row_index, 180, 37, 1.5, background_color=self.background_color)
+        self.row_index -= 7
+
+        # Section title
+        self._write_text(c, "A2: Spracovanie", self.left_margin_inside, self.row_index, bold=True, size=12)
+        self.row_index -= 13
+        
+        # Processing data
+        self._write_text(c, "Zaevidovanie do 006HMH HOW-zoznam:", self.left_margin_inside, self.row_index, size=10)
+        self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
+        self._create_interactive_frame(c, 90, self.row_index+5, 60, 7, 0.5, 'name', "Zadaj meno", background_color=Colors.LIGHT_BLUE)
+        self.row_index -= 8
+
+        self._write_text(c, "Platnosť výstupnej kontroly:", self.left_margin_inside, self.row_index, size=10)
+        self._create_frame(c, 90, self.row_index+5, 60, 7, 0.5, background_color=Colors.LIGHT_BLUE)
+        self._create_interactive_frame(c, 90, self.row_index+5, 60, 7, 0.5, 'validity', "Zadaj dátum", background_color=Colors.LIGHT_BLUE)
+        self.row_index -= 8
+
+    def _create_operations(self, c):
+        """
+        Create operations section of the first page.
+        
+        Args:
+            c: Canvas object
+        """
+        self.row_index -= 5
+        # Main frame
+        self._create_frame(c, self.left_margin, self.row_index, 85, 95, 1.5, background_color=self.background_color)
+        self.row_index -= 7
+
+        # Section title
+        self._write_text(c, "B1: Evidencia blokov operácií", self.left_margin_inside, self.row_index, bold=True, size=12)
+        self.row_index -= 13
+        
+        # Operations data
+        operations = [
+            ["Vstupná kontrola:", self.input_check],
+            ["Doosadenie, úprava DPS:", self.additional_assembly],
+            ["Elektrické prepojenia - výroba:", self.cable_production],
+            ["Elektrické prepojenia - kontrola:", self.cable_check],
+            ["Meranie izolačných pevností:", self.isolation_measurement],
+            ["Programovanie a konfigurácia:", self.programming],
+            ["Elektrický test DPS:", self.electrical_test],
+            ["Lakovanie a UV kontrola DPS:", self.coating],
+            ["Fixácia komponentov na DPS:", self.component_fixing],
+            ["Montáž konštrukčných prvkov:", self.structural_assembly],
+            ["Kalibrácia:", self.calibration],
+            ["Označenie polotovaru:", self.product_marking],
+            ["Ukončovacie práce:", self.finishing_work]
+        ]
+        
+        # Draw operations
+        for text, value in operations:
+            self._write_text(c, text, self.left_margin_inside, self.row_index, size=10)
+            self._create_checkbox(c, 90, self.row_index, size=4, checked=value)
+            self.row_index -= 6
+
+    def _create_signatures(self, c):
+        """
+        Create operations section of the first page.
+        
+        Args:
+            c: Canvas object
+        """
+        self.row_index = 107
+        
+        # Main frame
+        x_pos = self.left_margin + 85 + 5
+        self._create_frame(c, x_pos, self.row_index, 90, 95, 1.5, background_color=self.background_color)
+        self.row_index -= 7
+
+        # Section title
+        self._write_text(c, "Podpisy:", x_pos+2, self.row_index, bold=True, size=12)
+        self.row_index -= 13
+
+        # Section for A1
+        self._write_text(c, "A1:", x_pos+2, self.row_index, bold=False, size=10)
+        self.row_index -= 2
+        self._create_frame(c, x_pos+2, self.row_index, 60, 14, 0.5, background_color=Colors.LIGHT_BLUE)
+        self.row_index -= 20
+
+        # Section for A2
+        self._write_text(c, "A2:", x_pos+2, self.row_index, bold=False, size=10)
+        self.row_index -= 2
+        self._create_frame(c, x_pos+2, self.row_index, 60, 14, 0.5, background_color=Colors.LIGHT_BLUE)
+        
+    @profiler.timed("first_page")
+    def _create_first_page(self, c):
+        """
+        Creates the first page of the protocol by combining header, processing and operations sections.
+        
+        Args:
+            c: Canvas object
+        """
+        self._create_header(c)
         self._create_processing(c)
         self._create_operations(c)
         self._create_signatures(c)
 
-    #################################################################################################################
-    def _add_page(self, c):
-        """Adds new page and resets row position."""
-        c.showPage()
-        self.row_index = self.row_index_max
-    
-    def _create_test_pages(self, c, start_pn):
+    #################################################################################################################
+    @profiler.timed("footer")
+    def _draw_footer(self, c):
+        """
+        Draws page number and protocol number into footer of current page.
+
+        Total page count is computed before rendering (_total_pages).
+
+        Args:
+            c: Canvas object
+        """
+        # Page number keeps its distance from the right edge of wider pages
+        x_page_num = 535 + self._page_width - A4[0]
+
+        fonts.register()
+        c.saveState()
+        c.setFillColor(colors.black)
+        c.setFont('Arial', 10)
+        c.drawString(x_page_num, 20, f"{c.getPageNumber() + self._page_offset}/{self._total_pages}")
+        c.drawString(42, 20, f"Číslo protokolu: {self.protocol_number}")
+        c.restoreState()
+
+    def _add_page(self, c):
+        """Adds new page and resets row position."""
+        if self.render_footer:
+            self._draw_footer(c)
+        c.showPage()
+        self._font = None
+        self.row_index = self.row_index_max
+
+    def _set_page_size(self, c, page_size):
+        """Sets size of current and following pages (points)."""
+        c.setPageSize(page_size)
+        self._page_width = page_size[0]
+    
+    def _do_form(self, c, name, draw):
+        """
+        Draw content through form XObject, defining the form on first use.
+
+        Args:
+            c: Canvas object
+            name (str): Form name
+            draw (callable): Draws content of the form
+        """
+        if name not in self._forms:
+            # Form starts with default graphics state, endForm restores the page one
+            page_font, self._font = self._font, None
+            c.beginForm(name)
+            draw()
+            c.endForm()
+            self._font = page_font
+            self._forms.add(name)
+        c.doForm(name)
+
+    def _draw_test_page_template(self, c):
+        """Draws static part of test page: header and section frame."""
+        layout = self.layout
+
+        # Page header
+        self._write_text(c, "SIEMENS", layout.margin, layout.header_y, bold=True, size=20)
+
+        # Section frame
+        self._create_frame(c, layout.margin, layout.frame_top, layout.frame_width, layout.frame_height, 1.5,
+                           background_color=self.background_color)
+
+    def _draw_group_header(self, c, title, labels):
+        """
+        Draws section title and vertical column labels (PN) of module group.
+
+        Args:
+            c: Canvas object
+            title (str): Section title
+            labels (list): Column labels
+        """
+        layout = self.layout
+        self._write_text(c, title, layout.x_test, layout.title_y, bold=True, size=12)
+
+        for i, label in enumerate(labels):
+            c.saveState()
+            c.translate((layout.x_results[i] + 4)*mm, layout.pn_y*mm)
+            c.rotate(90)
+            c.setFont("ArialBold", 8)
+            c.drawString(0, 0, label)
+            c.restoreState()
+
+    def _get_tests_to_display(self, pn):
+        """
+        Returns test indexes to display based on display_all_reports setting.
+
+        Args:
+            pn (int): Production number whose report gives test order and Report flags
+
+        Returns:
+            list: Test indexes
+        """
+        results = self.results
+        start_cell = results.cell(results.get_row(pn), 0)
+
+        if self.display_all_reports:
+            return results.get_order(pn)
+
+        # Create list of tests with Report=true
+        return [test for test in results.get_order(pn) if results.report[start_cell + test]]
+
+    @profiler.timed("test_pages")
+    def _create_test_pages(self, c, pns, section="B2: Výsledky testov pre moduly"):
+        """
+        Creates pages with test tables for one group of modules (modules per page of layout).
+
+        Args:
+            c: Canvas object
+            pns (list): Production numbers of group
+            section (str): Section title before PN range
+        """
+
+        layout = self.layout
+        results = self.results
+        start_pn = pns[0]
+
+        tests_to_display = self._get_tests_to_display(start_pn)
+        num_tests = len(tests_to_display)
+        
+        # Maximum tests per page
+        max_tests_per_page = layout.tests_per_page
+        
+        # Calculate number of needed pages
+        num_pages = (num_tests + max_tests_per_page - 1) // max_tests_per_page
+        
+        # For each page
+        for page_num in range(num_pages):
+            if page_num > 0:
+                self._add_page(c)  # New page
+                
+            # Page header and frame - same on all test pages
+            self._do_form(c, "test_page", lambda: self._draw_test_page_template(c))
+
+            # Table dimensions setup
+            pn_column = layout.pn_column
+            row_height = layout.row_height
+            x_test = layout.x_test
+            x_unit = layout.x_unit
+            x_results = layout.x_results
+
+            # Section title and vertical text for PN - form pays off only for module group with many pages
+            title = f"{section} V{start_pn:06d} - V{pns[-1]:06d}"
+            labels = [f"V{pn:06d}" for pn in pns]
+            if num_pages >= self.GROUP_FORM_MIN_PAGES:
+                self._do_form(c, f"test_group_{start_pn}", lambda: self._draw_group_header(c, title, labels))
+            else:
+                self._draw_group_header(c, title, labels)
+            
+            self.row_index = layout.first_row_y
+            
+            # Determine test range for current page
+            start_index = page_num * max_tests_per_page
+            end_index = min((page_num + 1) * max_tests_per_page, len(tests_to_display))
+            
+            # Draw test rows for current page, cells are drawn in one batch
+            batch = CellBatch()
+            for test in tests_to_display[start_index:end_index]:
+                # Test name
+                test_code = results.codes[test]
+                batch.add_label(f"{test_code}: {results.test_names[test]}", x_test, self.row_index, 7)
+
+                unit = results.get_unit(start_pn, test)
+                if unit:
+                    batch.add_label(f"[{unit}]", x_unit, self.row_index, 7)
+                        
+                # Results for each module
+                for i, pn in enumerate(pns):
+                    cell = results.cell(results.get_row(pn), test)
+                    result = results.passed[cell]
+                    
+                    if result:
+                        color = Colors.LIGHT_GREEN
+                        if results.results.is_number(cell):
+                            display_text = f"{results.results.get(cell)}"[:5]
+                        else:
+                            display_text = "PASS"
+                    else:
+                        color = Colors.LIGHT_RED
+                        if results.results.is_number(cell):
+                            display_text = f"{results.results.get(cell)}"[:5]
+                        else:
+                            display_text = "FAIL"
+                        if self.failure_notes:
+                            batch.add_note(x_results[i]-1, self.row_index+3, pn_column, row_height-1,
+                                           f"V{pn:06d}", self._get_failure_note(pn, test))
+
+                    # Colored background, frame and result text
+                    batch.add_cell(x_results[i]-1, self.row_index+3, pn_column, row_height-1, color,
+                                   (display_text, x_results[i], self.row_index), 6)
+                
+                self.row_index -= row_height
+
+            batch.draw(c, line_width=0.3)
+
+    def _get_failure_note(self, pn, test):
+        """
+        Returns content of note for failed result of unit.
+
+        Args:
+            pn (int): Production number
+            test (int): Test index
+
+        Returns:
+            str: Test name, limits, measured value and unit of the result
+        """
+        test_data = self.results.get_test_data(pn, test)
+        lines = [f"{test_data['Code']}: {self.results.test_names[test]}"]
+        for key in ("Min", "Max", "ResultDesc", "Unit"):
+            if test_data.get(key) not in (None, ""):
+                lines.append(f"{key}: {test_data[key]}")
+        return "\n".join(lines)
+
+    @profiler.timed("summary_pages")
+    def _create_summary_pages(self, c, summary):
+        """
+        Creates pages with statistics of tests over all modules followed by
+        test tables of modules with failed test or result outside of sigma band.
+
+        Args:
+            c: Canvas object
+            summary (tuple): Data from _get_summary_data
+        """
+        layout = self.layout
+        results = self.results
+        tests_to_display, statistics, outliers = summary
+
+        labels = list(self.SUMMARY_LABELS)
+        title = (f"B2: Súhrn výsledkov testov pre moduly V{self.min_pn:06d} - V{self.max_pn:06d} "
+                 f"({len(results.pns)} ks)")
+        max_tests_per_page = layout.tests_per_page
+        num_pages = (len(tests_to_display) + max_tests_per_page - 1) // max_tests_per_page
+
+        for page_num in range(num_pages):
+            if page_num > 0:
+                self._add_page(c)
+
+            self._do_form(c, "test_page", lambda: self._draw_test_page_template(c))
+            self._draw_group_header(c, title, labels)
+            self.row_index = layout.first_row_y
+
+            batch = CellBatch()
+            for test in tests_to_display[page_num * max_tests_per_page:(page_num + 1) * max_tests_per_page]:
+                batch.add_label(f"{results.codes[test]}: {results.test_names[test]}", layout.x_test, self.row_index, 7)
+                unit = results.get_unit(self.min_pn, test)
+                if unit:
+                    batch.add_label(f"[{unit}]", layout.x_unit, self.row_index, 7)
+
+                test_statistics = statistics[test]
+                limit_min, limit_max = results.get_limits(self.min_pn, test)
+                below = (limit_min is not None and test_statistics["Min"] is not None
+                         and test_statistics["Min"] < limit_min)
+                above = (limit_max is not None and test_statistics["Max"] is not None
+                         and test_statistics["Max"] > limit_max)
+
+                cells = [
+                    (str(test_statistics["Passed"]), Colors.LIGHT_GREEN),
+                    (str(test_statistics["Failed"]), Colors.LIGHT_RED if test_statistics["Failed"] else Colors.LIGHT_GREEN),
+                    (self._format_statistic(limit_min), Colors.GREY),
+                    (self._format_statistic(limit_max), Colors.GREY),
+                    (self._format_statistic(test_statistics["Min"]), Colors.LIGHT_RED if below else Colors.WHITE),
+                    (self._format_statistic(test_statistics["Mean"]), Colors.WHITE),
+                    (self._format_statistic(test_statistics["Max"]), Colors.LIGHT_RED if above else Colors.WHITE),
+                    (self._format_statistic(test_statistics["Stdev"]), Colors.WHITE)
+                ]
+                for i, (text, color) in enumerate(cells):
+                    batch.add_cell(layout.x_results[i]-1, self.row_index+3, layout.pn_column, layout.row_height-1,
+                                   color, (text, layout.x_results[i], self.row_index), 6)
+
+                self.row_index -= layout.row_height
+
+            batch.draw(c, line_width=0.3)
+
+        # Full results only for failed modules and outliers
+        section = f"B3: Moduly s chybou alebo mimo ±{self.sigma_band:g}σ"
+        for start in range(0, len(outliers), layout.modules_per_page):
+            self._add_page(c)
+            self._create_test_pages(c, outliers[start:start + layout.modules_per_page], section)
+
+    @staticmethod
+    def _format_statistic(value):
+        """Formats statistic value into result cell (at most 7 characters, "-" for None)."""
+        if value is None:
+            return "-"
+        text = f"{value:.4g}"
+        if len(text) > 7:
+            text = f"{value:.0e}"
+        return text
+
+    #################################################################################################################
+    def _get_module_groups(self):
+        """
+        Returns groups of production numbers shown together on test pages.
+
+        Returns:
+            list: Lists of production numbers, empty if there are no tests to report
+        """
+        first_cell = self.results.cell(self.results.get_row(self.min_pn), 0)
+        if not any(self.results.report[first_cell:first_cell + self.results.test_count]):
+            return []
+
+        modules_per_page = self.layout.modules_per_page
+        return [list(range(start_pn, min(start_pn + modules_per_page - 1, self.max_pn) + 1))
+                for start_pn in range(self.min_pn, self.max_pn + 1, modules_per_page)]
+
+    def _count_test_pages(self, pns):
+        """
+        Returns number of pages created by _create_test_pages for module group.
+
+        Args:
+            pns (list): Production numbers of group
+
+        Returns:
+            int: Number of pages (group without tests still takes one page)
+        """
+        num_tests = len(self._get_tests_to_display(pns[0]))
+        return max(1, (num_tests + self.layout.tests_per_page - 1) // self.layout.tests_per_page)
+
+    def _get_summary_data(self):
+        """
+        Computes data shown by _create_summary_pages.
+
+        Returns:
+            tuple: (displayed test indexes, test -> statistics, production numbers of outliers)
+
+        Raises:
+            ValueError: Layout has less result columns than statistics table needs
+        """
+        if self.layout.modules_per_page < len(self.SUMMARY_LABELS):
+            raise ValueError(f"Súhrnná tabuľka potrebuje {len(self.SUMMARY_LABELS)} stĺpcov, "
+                             f"rozloženie strany má len {self.layout.modules_per_page}")
+
+        tests_to_display = self._get_tests_to_display(self.min_pn)
+        statistics = {test: self.results.test_statistics(test) for test in tests_to_display}
+        outliers = self.results.outlier_units(statistics, self.sigma_band)
+        return tests_to_display, statistics, outliers
+
+    def _count_pages(self, groups, summary=None):
+        """
+        Returns number of pages of whole protocol.
+
+        Args:
+            groups (list): Module groups from _get_module_groups
+            summary (tuple): Data from _get_summary_data in summary mode (None otherwise)
+
+        Returns:
+            int: Number of pages including first page
+        """
+        if not groups:
+            return 1
+        if summary is None:
+            return 1 + sum(self._count_test_pages(pns) for pns in groups)
+
+        tests_to_display, _, outliers = summary
+        tests_per_page = self.layout.tests_per_page
+        pages = max(1, (len(tests_to_display) + tests_per_page - 1) // tests_per_page)
+        for start in range(0, len(outliers), self.layout.modules_per_page):
+            pages += self._count_test_pages(outliers[start:start + self.layout.modules_per_page])
+        return 1 + pages
+
+    def _begin_canvas(self, filename, page_size):
+        """
+        Creates canvas for protocol or its segment.
+
+        Args:
+            filename: Output file path or file-like object
+            page_size (tuple): Size of first page (points)
+
+        Returns:
+            Canvas object
+        """
+        c = canvas.Canvas(filename, pagesize=page_size)
+        self._page_width = page_size[0]
+        # Forms (XObjects) belong to this document
+        self._forms = set()
+        # New canvas starts with its default font
+        self._font = None
+        return c
+
+    @profiler.timed("create_pdf")
+    def create_pdf(self, filename):
+        """
+        Creates complete PDF protocol.
+
+        With render_footer enabled, page numbers and protocol number are drawn
+        while each page is rendered, so no footer post-processing is needed.
+        Total page count is computed in advance.
+
+        Args:
+            filename: Output file path or file-like object
+        """
+        _import_pdf_modules()
+        groups = self._get_module_groups()
+        summary = self._get_summary_data() if groups and self.summary_mode else None
+        self._total_pages = self._count_pages(groups, summary)
+        try:
+            c = self._begin_canvas(filename, A4)
+
+            # Create first page
+            self._create_first_page(c)
+
+            # Create test pages if there are tests to report
+            if summary is not None:
+                self._add_page(c)
+                self._set_page_size(c, self.layout.page_size)
+                self._create_summary_pages(c, summary)
+            else:
+                for pns in groups:
+                    self._add_page(c)  # Always add new page for test pages
+                    # First page stays A4 portrait, test pages use page size of layout
+                    self._set_page_size(c, self.layout.page_size)
+                    self._create_test_pages(c, pns)
+
+            if self.render_footer:
+                self._draw_footer(c)
+
+            with profiler.stage("save"):
+                c.save()
+        finally:
+            self._total_pages = None
+
+    def create_pdf_segments(self, directory, pages_per_segment):
+        """
+        Creates PDF protocol as consecutive segment files.
+
+        Every segment is a separate canvas, so memory used by rendering does
+        not grow with size of the lot. Segments are split between module
+        groups and hold at most pages_per_segment pages (unless one group is
+        longer). Total page count is computed in advance, so footers of all
+        segments are numbered through the whole protocol.
+
+        Summary protocol is short and is always created as one segment.
+
+        Args:
+            directory (str): Directory for segment files
+            pages_per_segment (int): Maximum number of pages in segment
+
+        Yields:
+            str: Path of finished segment file, caller removes it when done
+        """
+        _import_pdf_modules()
+        groups = self._get_module_groups()
+
+        if groups and self.summary_mode:
+            segment_file = os.path.join(directory, "segment_0000.pdf")
+            self.create_pdf(segment_file)
+            yield segment_file
+            return
+
+        group_pages = [self._count_test_pages(pns) for pns in groups]
+        self._total_pages = 1 + sum(group_pages)
+        self._page_offset = 0
+        try:
+            segment_file = os.path.join(directory, "segment_0000.pdf")
+            c = self._begin_canvas(segment_file, A4)
+            self._create_first_page(c)
+            segment_pages = 1
+
+            for pns, num_pages in zip(groups, group_pages):
+                if segment_pages + num_pages > pages_per_segment:
+                    # Finish current segment, next group starts new canvas
+                    if self.render_footer:
+                        self._draw_footer(c)
+                    with profiler.stage("save"):
+                        c.save()
+                    yield segment_file
+
+                    self._page_offset += segment_pages
+                    segment_file = os.path.join(directory, f"segment_{self._page_offset:04d}.pdf")
+                    c = self._begin_canvas(segment_file, self.layout.page_size)
+                    self.row_index = self.row_index_max
+                    segment_pages = 0
+                else:
+                    self._add_page(c)
+                    self._set_page_size(c, self.layout.page_size)
+
+                self._create_test_pages(c, pns)
+                segment_pages += num_pages
+
+            if self.render_footer:
+                self._draw_footer(c)
+            with profiler.stage("save"):
+                c.save()
+            yield segment_file
+        finally:
+            self._page_offset = 0
+            self._total_pages = None
+
+#####################################################################################################################
+def parse_report_filename(filename):
+    """
+    Extract SN number and timestamp from report filename.
+
+    Standard names (CARD#V000666_20250603_141404.json) are parsed by string
+    slicing, other names fall back to regular expression search.
+
+    Args:
+        filename (str): Report filename
+
+    Returns:
+        tuple: (SN number (int), timestamp (str YYYYMMDD_HHMMSS)) or None
+    """
+    stem = filename[:-5]
+    if (len(stem) >= 23 and stem[-23] == 'V' and stem[-16] == '_' and stem[-7] == '_'
+            and stem[-22:-16].isdigit() and stem[-15:-7].isdigit() and stem[-6:].isdigit()):
+        return int(stem[-22:-16]), stem[-15:]
+
+    match = re.search(r'V(\d{6})_(\d{8}_\d{6})', filename)
+    if match:
+        return int(match.group(1)), match.group(2)
+    return None
+
+def schema_fingerprint(tests):
+    """
+    Return stable hash of test schema of report.
+
+    Args:
+        tests (list): Tests of report (Code, Name, Unit)
+
+    Returns:
+        str: Hex digest of ordered (Code, Name, Unit) tuples
+    """
+    digest = hashlib.sha1()
+    for test in tests:
+        digest.update(f"{test.get('Code')}\x1f{test.get('Name')}\x1f{test.get('Unit', '')}\x1e".encode('utf-8'))
+    return digest.hexdigest()
+
+class _IncompleteReport(Exception):
+    """Raised by ReportReader when buffered text ends inside of a value."""
+
+class ReportReader:
+    """
+    Incremental reader of JSON test reports.
+
+    The file is read in chunks and walked member by member. Only the fields
+    used by the protocol are decoded, everything else (Start, LibVersion,
+    SafeBytes.SWNameVer, Done, waveform data, ...) is skipped by bracket scan
+    without creating Python objects. SafeBytes.SN and AllTestsDone are checked
+    as soon as they are read and the rest of the file is not parsed when the
+    check fails.
+
+    Small reports are faster to decode at once by the C parser, so only files
+    larger than SMALL_REPORT_SIZE are walked incrementally.
+    """
+    CHUNK_SIZE = 64 * 1024
+    SMALL_REPORT_SIZE = 256 * 1024
+    # Tests up to this size are decoded at once and trimmed afterwards
+    SMALL_TEST_SIZE = 4096
+
+    REPORT_FIELDS = frozenset(("UserName", "AllTestsDone", "Passed", "CardTypeName"))
+    SAFE_BYTES_FIELDS = frozenset(("SN",))
+    TEST_FIELDS = frozenset(("Code", "Name", "Passed", "Report", "ResultDesc", "Unit", "Min", "Max"))
+
+    _WHITESPACE = re.compile(r'[ \t\n\r]*')
+    _STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+    # Start of string or bracket
+    _TOKEN = re.compile(r'[\[\]{}"]')
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, f, chunk_size=None):
+        """
+        Initialize ReportReader.
+
+        Args:
+            f (file): Report opened in text mode
+            chunk_size (int): Size of the first read (CHUNK_SIZE if None)
+        """
+        self.file = f
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    @classmethod
+    def read(cls, full_path, expected_sn=None):
+        """
+        Read needed fields of report file.
+
+        Args:
+            full_path (str): Path to JSON report
+            expected_sn (int): SN number the report must contain (not checked if None)
+
+        Returns:
+            dict: UserName, AllTestsDone, Passed, CardTypeName, SafeBytes (SN)
+                and Tests (Code, Name, Passed, Report, ResultDesc, Unit, Min, Max).
+                When SN or AllTestsDone check fails, only fields read so far are returned.
+        """
+        with open(full_path, 'r', encoding='utf-8') as f:
+            if os.fstat(f.fileno()).st_size <= cls.SMALL_REPORT_SIZE:
+                return cls.trim(json.load(f))
+            return cls(f).parse(expected_sn)
+
+    @classmethod
+    def trim(cls, data):
+        """
+        Keep only needed fields of fully decoded report.
+
+        Args:
+            data (dict): Decoded report
+
+        Returns:
+            dict: Needed fields of report (see read)
         """
-        Creates pages with test tables for 10 modules.
+        report = {key: value for key, value in data.items() if key in cls.REPORT_FIELDS}
+        if "SafeBytes" in data:
+            report["SafeBytes"] = {key: value for key, value in data["SafeBytes"].items()
+                                   if key in cls.SAFE_BYTES_FIELDS}
+        if "Tests" in data:
+            report["Tests"] = [{key: value for key, value in test.items() if key in cls.TEST_FIELDS}
+                               for test in data["Tests"]]
+        return report
+
+    def parse(self, expected_sn=None):
         """
+        Parse report from file.
 
-        # Create list of tests to display based on display_all_reports setting
-        if self.display_all_reports:
-            tests_to_display = list(self.reports[start_pn]["Tests"].keys())
-            # Count all tests
-            num_tests = len(self.reports[start_pn]["Tests"])
+        Args:
+            expected_sn (int): SN number the report must contain (not checked if None)
+
+        Returns:
+            dict: Needed fields of report (see read)
+        """
+        data = {}
+        read_tests = True
+
+        more = self._attempt(self._open, "{")
+        while more:
+            key = self._attempt(self._read_key)
+
+            if key == "Tests" and read_tests:
+                data["Tests"] = self._read_tests()
+            elif key == "SafeBytes":
+                data["SafeBytes"] = self._attempt(self._read_object, self.SAFE_BYTES_FIELDS)
+            elif key in self.REPORT_FIELDS:
+                data[key] = self._attempt(self._decode_value)
+            else:
+                self._attempt(self._skip_value)
+
+            # Early checks - protocol stops on wrong SN or unfinished tests
+            safe_bytes = data.get("SafeBytes")
+            if safe_bytes is not None and expected_sn is not None and safe_bytes.get("SN") != expected_sn:
+                return data
+            if "AllTestsDone" in data and not data["AllTestsDone"]:
+                if safe_bytes is not None:
+                    return data
+                read_tests = False
+
+            more = self._attempt(self._next_item, "}")
+
+        return data
+
+    def _read_tests(self):
+        """Read array of tests, keeping only TEST_FIELDS of each test."""
+        tests = []
+        more = self._attempt(self._open, "[")
+        while more:
+            tests.append(self._attempt(self._read_test))
+            more = self._attempt(self._next_item, "]")
+        self._attempt(self._end_value)
+        return tests
+
+    def _attempt(self, step, *args):
+        """
+        Run parsing step from current position, reading more text while the step needs it.
+
+        Args:
+            step (callable): Step taking position (and args) returning (result, new position)
+
+        Returns:
+            Result of step
+        """
+        while True:
+            try:
+                result, self.pos = step(self.pos, *args)
+                return result
+            except _IncompleteReport:
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON report") from None
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def _fill(self):
+        """Read next part of file. Returns False when file end was already reached."""
+        if self.eof:
+            return False
+
+        # Drop parsed text, read at least as much as is left unparsed
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer)))
+        if chunk:
+            self.buffer += chunk
         else:
-            # Create list of tests with Report=true
-            tests_to_display = []
-            num_tests = 0
-            for name, test in self.reports[start_pn]["Tests"].items():
-                if test["Report"]:
-                    tests_to_display.append(name)
-                    num_tests += 1
-        
-        # Maximum tests per page
-        max_tests_per_page = 44
-        
-        # Calculate number of needed pages
-        num_pages = (num_tests + max_tests_per_page - 1) // max_tests_per_page
-        
-        # For each page
-        for page_num in range(num_pages):
-            if page_num > 0:
-                c.showPage()  # New page
-                
-            # Reset position for new page
-            self.row_index = 280
-            
-            # Page header
-            self._write_text(c, "SIEMENS", self.left_margin, self.row_index, bold=True, size=20)
-            self.row_index -= 15
+            self.eof = True
+        return True
 
-            # Section title
-            self._create_frame(c, self.left_margin, self.row_index, 180, 253, 1.5, background_color=self.background_color)
-            self.row_index -= 7
-            
-            self._write_text(c, f"B2: Výsledky testov pre moduly V{start_pn:06d} - V{min(start_pn + 9, self.max_pn):06d}", 
-                    self.left_margin + 2, self.row_index, bold=True, size=12)
-            self.row_index -= 5
+    def _skip_whitespace(self, pos):
+        return self._WHITESPACE.match(self.buffer, pos).end()
 
-            # Table dimensions setup
-            test_column = 65
-            pn_column = 9
-            spacing = 1
-            row_height = 5
-            header_height = 20
-
-            # Initial x-positions for tests results columns
-            x_test = self.left_margin + 2
-            x_unit = x_test + test_column - 10
-            x_results_start = x_test + test_column
-            x_results = [x_results_start + (i * (pn_column + spacing)) for i in range(10)]
-
-            # Vertical text for PN
-            for i in range(10):
-                pn = start_pn + i
-                if pn > self.max_pn:
-                    break
-                
-                c.saveState()
-                c.translate((x_results[i] + 4)*mm, (self.row_index-header_height+5)*mm)
-                c.rotate(90)
-                c.setFont("ArialBold", 8)
-                c.drawString(0, 0, f"V{pn:06d}")
-                c.restoreState()
-            
-            self.row_index -= header_height
-            
-            # Determine test range for current page
-            start_index = page_num * max_tests_per_page
-            end_index = min((page_num + 1) * max_tests_per_page, len(tests_to_display))
-            
-            # Draw test rows for current page
-            for test_name in tests_to_display[start_index:end_index]:
-                # Test name
-                test_code = self.reports[start_pn]["Tests"][test_name].get("Code", "")
-                self._write_text(c, f"{test_code}: {test_name}", x_test, self.row_index, size=7)
+    def _char(self, pos):
+        if pos >= len(self.buffer):
+            raise _IncompleteReport()
+        return self.buffer[pos]
 
-                if "Unit" in self.reports[start_pn]["Tests"][test_name]:
-                    unit = self.reports[start_pn]["Tests"][test_name]["Unit"]
-                    if unit:
-                        self._write_text(c, f"[{unit}]", x_unit, self.row_index, size=7)
-                        
-                # Results for each module
-                for i in range(10):
-                    pn = start_pn + i
-                    if pn > self.max_pn:
-                        break
-                        
-                    test_data = self.reports[pn]["Tests"][test_name]
-                    result = test_data["Passed"]
-                    resultdesc = test_data["ResultDesc"]
-                    
-                    if result:
-                        color = Colors.LIGHT_GREEN
-                        if isinstance(resultdesc, (int, float)):
-                            display_text = f"{resultdesc}"[:5]
-                        else:
-                            display_text = "PASS"
-                    else:
-                        color = Colors.LIGHT_RED
-                        if isinstance(resultdesc, (int, float)):
-                            display_text = f"{resultdesc}"[:5]
-                        else:
-                            display_text = "FAIL"
+    def _delimiter(self, pos):
+        """Return position of delimiter following value (it must be already read)."""
+        pos = self._skip_whitespace(pos)
+        if self._char(pos) not in ",]}":
+            raise json.JSONDecodeError("Expecting ',' delimiter", self.buffer, pos)
+        return pos
 
-                    # Colored background for result
-                    self._create_frame(c, x_results[i]-1, self.row_index+3, 
-                                    pn_column, row_height-1, 0.3, background_color=color)
-                    
-                    # Result text
-                    self._write_text(c, display_text, x_results[i], self.row_index, size=6)
-                
-                self.row_index -= row_height
+    def _open(self, pos, opening):
+        """Enter object or array. Returns (True if not empty, position of first item)."""
+        pos = self._skip_whitespace(pos)
+        if self._char(pos) != opening:
+            raise json.JSONDecodeError(f"Expecting '{opening}'", self.buffer, pos)
+        pos = self._skip_whitespace(pos + 1)
+        if self._char(pos) == ("}" if opening == "{" else "]"):
+            return False, pos + 1
+        return True, pos
+
+    def _next_item(self, pos, closing):
+        """Move after delimiter. Returns (True if next item follows, position)."""
+        char = self._char(pos)
+        if char == ",":
+            return True, self._skip_whitespace(pos + 1)
+        if char == closing:
+            return False, pos + 1
+        raise json.JSONDecodeError(f"Expecting ',' or '{closing}'", self.buffer, pos)
+
+    def _end_value(self, pos):
+        return None, self._delimiter(pos)
+
+    def _read_key(self, pos):
+        pos = self._skip_whitespace(pos)
+        key, pos = self._decoder.raw_decode(self.buffer, pos)
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name", self.buffer, pos)
+        pos = self._skip_whitespace(pos)
+        if self._char(pos) != ":":
+            raise json.JSONDecodeError("Expecting ':' delimiter", self.buffer, pos)
+        return key, self._skip_whitespace(pos + 1)
+
+    def _decode_value(self, pos):
+        pos = self._skip_whitespace(pos)
+        value, end = self._decoder.raw_decode(self.buffer, pos)
+        return value, self._delimiter(end)
+
+    def _container_end(self, pos, limit=None):
+        """
+        Find end of object or array starting at pos by bracket scan.
+
+        Args:
+            pos (int): Position of opening bracket
+            limit (int): Maximal length of container (not limited if None)
+
+        Returns:
+            int: Position after closing bracket, None if container is longer than limit
+        """
+        depth = 0
+        endpos = len(self.buffer) if limit is None else min(len(self.buffer), pos + limit)
+        search = self._TOKEN.search
+        while True:
+            match = search(self.buffer, pos, endpos)
+            if match is None:
+                if endpos < len(self.buffer):
+                    return None
+                raise _IncompleteReport()
+            token = match.group()
+            if token == '"':
+                # Brackets inside of strings are ignored
+                match = self._STRING.match(self.buffer, match.start())
+                if match is None:
+                    raise _IncompleteReport()
+            elif token == "{" or token == "[":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+            pos = match.end()
+
+    def _skip_value(self, pos):
+        """Find end of value without decoding it."""
+        pos = self._skip_whitespace(pos)
+        char = self._char(pos)
+        if char in "{[":
+            return None, self._delimiter(self._container_end(pos))
+        if char == '"':
+            match = self._STRING.match(self.buffer, pos)
+            if match is None:
+                raise _IncompleteReport()
+            return None, self._delimiter(match.end())
+        return self._decode_value(pos)
+
+    def _read_object(self, pos, fields):
+        """Decode object, keeping only members in fields."""
+        result = {}
+        more, pos = self._open(pos, "{")
+        while more:
+            key, pos = self._read_key(pos)
+            if key in fields:
+                result[key], pos = self._decode_value(pos)
+            else:
+                _, pos = self._skip_value(pos)
+            more, pos = self._next_item(pos, "}")
+        return result, self._delimiter(pos)
+
+    def _read_test(self, pos):
+        """Decode one test. Small tests are decoded at once, large ones member by member."""
+        pos = self._skip_whitespace(pos)
+        if self._char(pos) != "{" or self._container_end(pos, self.SMALL_TEST_SIZE) is None:
+            return self._read_object(pos, self.TEST_FIELDS)
+
+        test, end = self._decoder.raw_decode(self.buffer, pos)
+        return {key: value for key, value in test.items() if key in self.TEST_FIELDS}, self._delimiter(end)
+
+class ReportCache:
+    """
+    Local cache of parsed reports.
+
+    Each report is stored as pickle file named by hash of its path, together
+    with mtime and size of the report, so a changed report is parsed again.
+    Entry mtime is refreshed on every hit and the least recently used entries
+    are removed when total size of cache exceeds max_size.
+    """
+    VERSION = 2
+    DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+    EXTENSION = ".pickle"
+
+    def __init__(self, cache_dir=None, max_size=DEFAULT_MAX_SIZE):
+        """
+        Initialize ReportCache.
+
+        Args:
+            cache_dir (str): Directory of cache (default_dir() if None)
+            max_size (int): Maximal total size of cache in bytes
+        """
+        self.cache_dir = cache_dir or self.default_dir()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_dir():
+        """Return cache directory (TMU_CACHE_DIR or local application data of user)."""
+        if os.environ.get("TMU_CACHE_DIR"):
+            return os.environ["TMU_CACHE_DIR"]
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(base, "TMU_ProtocolGenerator", "reports")
+
+    def _entry_path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + self.EXTENSION)
+
+    @staticmethod
+    def _key(full_path):
+        return os.path.normcase(os.path.abspath(full_path))
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, full_path, stat):
+        """
+        Return cached report if the report file did not change.
+
+        Args:
+            full_path (str): Path to JSON report
+            stat (os.stat_result): Current stat of report
+
+        Returns:
+            dict: Parsed report or None if not cached
+        """
+        key = self._key(full_path)
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'rb') as f:
+                version, cached_key, mtime, size, data = pickle.load(f)
+        except Exception:
+            # Missing or damaged entry is parsed again
+            self._count(False)
+            return None
+
+        if (version, cached_key, mtime, size) != (self.VERSION, key, stat.st_mtime_ns, stat.st_size):
+            self._count(False)
+            return None
+
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        self._count(True)
+        return data
+
+    def put(self, full_path, stat, data):
+        """
+        Store parsed report. Errors are ignored, cache is only optional.
+
+        Args:
+            full_path (str): Path to JSON report
+            stat (os.stat_result): Stat of report before it was parsed
+            data (dict): Parsed report
+        """
+        key = self._key(full_path)
+        entry_path = self._entry_path(key)
+        temp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                pickle.dump((self.VERSION, key, stat.st_mtime_ns, stat.st_size, data), f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, entry_path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(temp_path)
+
+    def prune(self):
+        """
+        Remove least recently used entries until cache fits into max_size.
+
+        Returns:
+            int: Number of removed entries
+        """
+        entries = []
+        total_size = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(self.EXTENSION):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+                        total_size += stat.st_size
+        except OSError:
+            return 0
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(path)
+                removed += 1
+            total_size -= size
+        return removed
+
+class ReportIndex:
+    """
+    Persistent index of the latest report for each card type and SN number.
+
+    Index is stored as compact JSON file next to the reports, unless another
+    index file is given. Each directory keeps its mtime, subdirectories and
+    latest report per card type and SN, so refresh only lists directories
+    whose mtime changed since the last run and the index is written again
+    only when their content changed. Records are keyed "CARD#SN" by filename
+    prefix, so reports of different card types with the same SN do not hide
+    each other.
+    """
+    INDEX_FILENAME = ".tmu_report_index.json"
+    VERSION = 2
+
+    def __init__(self, path, index_file=None):
+        """
+        Initialize ReportIndex.
+
+        Args:
+            path (str): Base path of reports
+            index_file (str): Path to index file (next to reports if None)
+        """
+        self.path = path
+        self.index_file = index_file or os.path.join(path, self.INDEX_FILENAME)
+        self.directories = {}
+        self.reports = {}
+        self.modified = False
+
+    def load(self):
+        """
+        Load index from disk.
+
+        Returns:
+            bool: True if index was loaded, False if it is missing or invalid
+        """
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("Version") != self.VERSION:
+            return False
+
+        self.directories = data["Directories"]
+        self.reports = data["Reports"]
+        self.modified = False
+        return True
+
+    def save(self):
+        """
+        Save index to disk if it was modified.
+
+        Returns:
+            bool: True if index is stored, False if it could not be written
+        """
+        if not self.modified:
+            return True
+
+        data = {
+            "Version": self.VERSION,
+            "Directories": self.directories,
+            "Reports": self.reports
+        }
+        # Index is written to temporary file and replaced at once, so concurrent
+        # runs never see partially written index
+        temp_file = f"{self.index_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        index_dir = os.path.dirname(os.path.abspath(self.index_file))
+        try:
+            mtime_before = os.stat(index_dir).st_mtime
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(temp_file, self.index_file)
+            self._update_index_dir_mtime(index_dir, mtime_before)
+        except OSError as e:
+            print(f"Nepodarilo sa uložiť index reportov {self.index_file}: {e}")
+            try:
+                os.remove(temp_file)
+            except OSError:
+                pass
+            return False
+
+        self.modified = False
+        return True
+
+    def _update_index_dir_mtime(self, index_dir, mtime_before):
+        """
+        Store mtime of indexed directory holding the index file after it was replaced.
+
+        Only own write is accounted for - if directory changed before the index
+        was written, its stored mtime stays different and it is listed again.
+        The saved index still holds the previous mtime, so the next run lists
+        the directory again, but writes the index only if its content changed.
+
+        Args:
+            index_dir (str): Absolute directory of index file
+            mtime_before (float): Directory mtime before index was written
+        """
+        relative_dir = os.path.relpath(index_dir, os.path.abspath(self.path))
+        if relative_dir == os.curdir:
+            relative_dir = ""
+        record = self.directories.get(relative_dir)
+        if record is not None and record["Mtime"] == mtime_before:
+            record["Mtime"] = os.stat(index_dir).st_mtime
+
+    @staticmethod
+    def _report_key(filename, sn_number):
+        """Return index key of report - card type prefix of filename and SN number."""
+        prefix = filename.split('#', 1)[0] if '#' in filename else ""
+        return f"{prefix}#{sn_number}"
+
+    @staticmethod
+    def _split_key(key):
+        """Return (card type prefix, SN number) of index key."""
+        prefix, sn_number = key.rsplit('#', 1)
+        return prefix, int(sn_number)
+
+    def _scan_directory(self, directory):
+        """
+        List one directory and keep the latest report per card type and SN number.
+
+        Args:
+            directory (str): Absolute directory path
+
+        Returns:
+            tuple: (list of subdirectory names, dict "CARD#SN" -> [timestamp, filename, mtime, size])
+        """
+        subdirs = []
+        files = {}
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+
+                if not entry.name.endswith('.json'):
+                    continue
+
+                parsed = parse_report_filename(entry.name)
+                if parsed is None:
+                    continue
+
+                sn_number, timestamp = parsed
+                key = self._report_key(entry.name, sn_number)
+                if key not in files or timestamp > files[key][0]:
+                    files[key] = [timestamp, entry.name, 0, 0]
+
+        for record in files.values():
+            stat = os.stat(os.path.join(directory, record[1]))
+            record[2] = stat.st_mtime
+            record[3] = stat.st_size
+
+        # Order of listing is not stable, sorted subdirectories compare equal between runs
+        subdirs.sort()
+        return subdirs, files
+
+    def refresh(self):
+        """
+        Incrementally update index by comparing directory mtimes.
+
+        Index is marked modified only if subdirectories or reports of a listed
+        directory changed, new mtime alone (e.g. of directory holding the index
+        file) is kept in memory only.
+
+        Returns:
+            int: Number of directories which had to be listed again
+        """
+        rescanned = 0
+        changed = 0
+        visited = set()
+        pending = [""]
+
+        while pending:
+            relative_dir = pending.pop()
+            directory = os.path.join(self.path, relative_dir) if relative_dir else self.path
+
+            try:
+                mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+
+            record = self.directories.get(relative_dir)
+            if record is None or record["Mtime"] != mtime:
+                try:
+                    subdirs, files = self._scan_directory(directory)
+                except OSError:
+                    continue
+                if record is None or record["Subdirs"] != subdirs or record["Files"] != files:
+                    changed += 1
+                record = {"Mtime": mtime, "Subdirs": subdirs, "Files": files}
+                self.directories[relative_dir] = record
+                rescanned += 1
+
+            visited.add(relative_dir)
+            for subdir in record["Subdirs"]:
+                pending.append(os.path.join(relative_dir, subdir))
+
+        # Forget directories which no longer exist
+        for relative_dir in list(self.directories):
+            if relative_dir not in visited:
+                del self.directories[relative_dir]
+                rescanned += 1
+                changed += 1
+
+        if changed:
+            self._update_reports()
+            self.modified = True
+
+        return rescanned
+
+    def _update_reports(self):
+        """Recompute the latest report per card type and SN number from directory records."""
+        latest = {}
+        for relative_dir, record in self.directories.items():
+            for key, (timestamp, filename, mtime, size) in record["Files"].items():
+                if key not in latest or timestamp > latest[key]["Timestamp"]:
+                    latest[key] = {
+                        "Timestamp": timestamp,
+                        "Path": os.path.join(relative_dir, filename),
+                        "Mtime": mtime,
+                        "Size": size,
+                        "CardTypeName": None,
+                        "Passed": None,
+                        "AllTestsDone": None
+                    }
+
+        # Keep already known metadata of unchanged files
+        for key, report in latest.items():
+            previous = self.reports.get(key)
+            if (previous and previous["Path"] == report["Path"]
+                    and previous["Mtime"] == report["Mtime"] and previous["Size"] == report["Size"]):
+                report["CardTypeName"] = previous["CardTypeName"]
+                report["Passed"] = previous["Passed"]
+                report["AllTestsDone"] = previous["AllTestsDone"]
+
+        self.reports = latest
+
+    def update_metadata(self, full_path, card_type_name, passed, all_tests_done):
+        """
+        Store report metadata read from JSON file.
+
+        Args:
+            full_path (str): Path of report the metadata was read from
+            card_type_name (str): CardTypeName from report
+            passed (bool): Passed flag from report
+            all_tests_done (bool): AllTestsDone flag from report
+        """
+        filename = os.path.basename(full_path)
+        parsed = parse_report_filename(filename)
+        if parsed is None:
+            return
+
+        key = self._report_key(filename, parsed[0])
+        report = self.reports.get(key)
+        if report is None or os.path.normcase(self.get_full_path(key)) != os.path.normcase(full_path):
+            return
+
+        if (report["CardTypeName"], report["Passed"], report["AllTestsDone"]) != (card_type_name, passed, all_tests_done):
+            report["CardTypeName"] = card_type_name
+            report["Passed"] = passed
+            report["AllTestsDone"] = all_tests_done
+            self.modified = True
+
+    def get_full_path(self, key):
+        """Return absolute path of the latest report for index key ("CARD#SN") or None."""
+        report = self.reports.get(key)
+        if report is None:
+            return None
+        return os.path.join(self.path, report["Path"])
+
+    def get_latest_files(self, min_pn, max_pn, card_type=None):
+        """
+        Return the latest reports for SN numbers within range.
+
+        Card type is filtered before the latest report is picked, so a newer
+        report of another card type with the same SN does not hide the report.
+
+        Args:
+            min_pn (int): Minimum production number
+            max_pn (int): Maximum production number
+            card_type (str): Keep only reports of this card type (None for all)
+
+        Returns:
+            dict: SN number (int) -> path of the most recent report
+        """
+        if card_type:
+            result = {}
+            for pn in range(min_pn, max_pn + 1):
+                full_path = self.get_full_path(f"{card_type}#{pn}")
+                if full_path:
+                    result[pn] = full_path
+            return result
+
+        latest = {}
+        for key, report in self.reports.items():
+            _, pn = self._split_key(key)
+            if min_pn <= pn <= max_pn and (pn not in latest or report["Timestamp"] > latest[pn]["Timestamp"]):
+                latest[pn] = report
+        return {pn: os.path.join(self.path, report["Path"]) for pn, report in latest.items()}
+
+    def rebuild(self):
+        """
+        Rebuild index from scratch including metadata of all latest reports.
+
+        Returns:
+            int: Number of indexed reports (card type and SN number)
+        """
+        self.directories = {}
+        self.reports = {}
+        self.refresh()
+
+        for key in self.reports:
+            full_path = self.get_full_path(key)
+            try:
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.update_metadata(full_path, data.get("CardTypeName"), data.get("Passed"), data.get("AllTestsDone"))
+            except (OSError, ValueError) as e:
+                print(f"Chyba pri čítaní súboru {full_path}: {str(e)}")
+
+        self.modified = True
+        return len(self.reports)
+
+#####################################################################################################################
+#####################################################################################################################
+class FailureDecisions:
+    """
+    Classifies failed units as repairable or unrepairable without user input.
+
+    Explicit decision for SN number has priority. Otherwise rules on failed test
+    codes are applied: any failed code from unrepairable_codes makes the unit
+    unrepairable, failed codes all contained in repairable_codes make it
+    repairable. Units not matched by any rule get default decision (None means
+    undecided - caller falls back to interactive prompt).
+    """
+    REPAIRABLE = "repairable"
+    UNREPAIRABLE = "unrepairable"
+
+    # Accepted spellings of decisions in decision files
+    _DECISION_NAMES = {
+        "repairable": REPAIRABLE,
+        "r": REPAIRABLE,
+        "opravitelna": REPAIRABLE,
+        "opraviteľná": REPAIRABLE,
+        "unrepairable": UNREPAIRABLE,
+        "u": UNREPAIRABLE,
+        "neopravitelna": UNREPAIRABLE,
+        "neopraviteľná": UNREPAIRABLE
+    }
+
+    def __init__(self, decisions=None, repairable_codes=None, unrepairable_codes=None, default=None):
+        """
+        Initialize FailureDecisions.
+
+        Args:
+            decisions (dict): SN number (int or "V000123") -> decision
+            repairable_codes (iterable): Test codes whose failure is repairable
+            unrepairable_codes (iterable): Test codes whose failure is unrepairable
+            default (str): Decision for unmatched units (None for undecided)
+        """
+        self.decisions = {}
+        for sn, decision in (decisions or {}).items():
+            self.decisions[self._parse_sn(sn)] = self._parse_decision(decision)
+
+        self.repairable_codes = set(repairable_codes or [])
+        self.unrepairable_codes = set(unrepairable_codes or [])
+        self.default = self._parse_decision(default) if default else None
+
+    @staticmethod
+    def _parse_sn(sn):
+        """Convert SN number in form 123, "123" or "V000123" to int."""
+        if isinstance(sn, int):
+            return sn
+        return int(str(sn).strip().lstrip("Vv"))
+
+    @classmethod
+    def _parse_decision(cls, decision):
+        """Convert decision name to REPAIRABLE or UNREPAIRABLE."""
+        name = str(decision).strip().lower()
+        if name not in cls._DECISION_NAMES:
+            raise ValueError(f"Neznáme rozhodnutie: {decision}")
+        return cls._DECISION_NAMES[name]
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Load decisions from CSV or JSON file.
+
+        CSV file has rows "SN;decision" (or comma separated), optional header.
+        JSON file is either mapping {"V000123": "repairable", ...} or object with
+        keys "Units", "RepairableCodes", "UnrepairableCodes" and "Default".
+
+        Args:
+            path (str): Path to decision file
+
+        Returns:
+            FailureDecisions: Loaded decisions
+        """
+        if path.lower().endswith('.json'):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if "Units" in data or "RepairableCodes" in data or "UnrepairableCodes" in data or "Default" in data:
+                return cls(
+                    decisions=data.get("Units"),
+                    repairable_codes=data.get("RepairableCodes"),
+                    unrepairable_codes=data.get("UnrepairableCodes"),
+                    default=data.get("Default")
+                )
+            return cls(decisions=data)
+
+        decisions = {}
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            lines = f.read().splitlines()
+
+        delimiter = ';' if lines and ';' in lines[0] else ','
+        for row_number, row in enumerate(csv.reader(lines, delimiter=delimiter)):
+            if len(row) < 2 or not row[0].strip():
+                continue
+            try:
+                decisions[cls._parse_sn(row[0])] = cls._parse_decision(row[1])
+            except ValueError:
+                if row_number == 0:
+                    continue  # header
+                raise
+        return cls(decisions=decisions)
+
+    def classify(self, sn, failed_codes):
+        """
+        Classify failed unit.
+
+        Args:
+            sn (int): SN number
+            failed_codes (list): Codes of failed tests
+
+        Returns:
+            str: REPAIRABLE, UNREPAIRABLE or None if undecided
+        """
+        if sn in self.decisions:
+            return self.decisions[sn]
 
-    #################################################################################################################
-    def create_pdf(self, filename):
-        """Creates complete PDF protocol."""
-        c = canvas.Canvas(filename, pagesize=A4)
-        
-        # Create first page
-        self._create_first_page(c)
-        
-        # Check if there are tests to report
-        has_reportable_tests = False
-        for test in self.reports[self.min_pn]["Tests"].values():
-            if test["Report"]:
-                has_reportable_tests = True
-                break
-        
-        # Create test pages if needed
-        if has_reportable_tests:
-            num_modules = self.max_pn - self.min_pn + 1
-            num_pages = (num_modules + 9) // 10  # round up
-            
-            for page in range(num_pages):
-                self._add_page(c)  # Always add new page for test pages
-                start_pn = self.min_pn + (page * 10)
-                self._create_test_pages(c, start_pn)
-        
-        c.save()
+        failed_codes = set(failed_codes)
+        if failed_codes & self.unrepairable_codes:
+            return self.UNREPAIRABLE
+        if failed_codes and self.repairable_codes and failed_codes <= self.repairable_codes:
+            return self.REPAIRABLE
+
+        return self.default
 
 #####################################################################################################################
 #####################################################################################################################
 class JsonProcessor:
-    def __init__(self, min_pn, max_pn, path="C:\\"):
+    def __init__(self, min_pn, max_pn, path="C:\\", card_type=None, use_index=False, load_workers=8,
+                 decisions=None, interactive=True, files_index=None, cache=None, index_file=None):
         """
         Initialize JsonProcessor.
 
@@ -824,54 +3596,107 @@ class JsonProcessor:
             min_pn (int): Minimum production number
             max_pn (int): Maximum production number
             path (str): Base path for JSON files
+            card_type (str): Card type (e.g. BIOM.2.6MA) used to skip unrelated
+                subdirectories and files during scan (None for all)
+            use_index (bool): Use persistent report index instead of full directory scan
+            load_workers (int): Number of threads reading and parsing reports
+            decisions (FailureDecisions): Source of repairable/unrepairable decisions
+                for failed units (None to always ask user)
+            interactive (bool): Ask user if decision source does not decide,
+                otherwise processing fails
+            files_index (dict): Already scanned index SN -> path shared by several
+                processors (None to scan path)
+            cache (ReportCache): Cache of parsed reports (None to always parse JSON)
+            index_file (str): Path to report index file (next to reports if None)
         """
         self.min_pn = min_pn
         self.max_pn = max_pn
-        self.reports = {}
+        self.results = None
         self.first_card_type = None
         self.first_tests_names = None
+        self.first_schema_fingerprint = None
         self.path = path
+        self.card_type = card_type
+        self.report_index = ReportIndex(path, index_file) if use_index else None
+        self.load_workers = max(1, load_workers)
+        self.decisions = decisions
+        self.interactive = interactive
+        self.files_index = files_index
+        self.cache = cache
         self.repairable_count = 0
         self.repairable_list = []
         self.unrepairable_count = 0
         self.unrepairable_list = []
         self.all_relevant_json_files = []
     
+    @profiler.timed("scan")
     def _get_list_of_all_json_files(self):
         """
-        Create a list of JSON files, keeping only the latest version for each SN number.
-        Returns a list of file paths containing only the most recent reports.
+        Create an index of JSON files, keeping only the latest version for each SN number.
+        Only SN numbers within min_pn..max_pn are kept.
+
+        Directory tree is scanned with os.scandir using filenames only. Files with
+        SN outside of range are rejected right after filename is sliced. Timestamps
+        (YYYYMMDD_HHMMSS) are compared as strings, so no datetime parsing is needed.
+        If card_type is set and base path contains subdirectory with that name,
+        only this subdirectory is scanned.
+
+        Returns:
+            dict: SN number (int) -> path of the most recent report
         """
-        # Dictionary to store files grouped by SN number
+        if self.files_index is not None:
+            return {pn: self.files_index[pn] for pn in range(self.min_pn, self.max_pn + 1) if pn in self.files_index}
+
+        if self.report_index is not None:
+            self.report_index.load()
+            self.report_index.refresh()
+            self.report_index.save()
+            return self.report_index.get_latest_files(self.min_pn, self.max_pn, self.card_type)
+
+        # Dictionary to store latest (timestamp, path) per SN number
         latest_records = {}
+
+        file_prefix = f"{self.card_type}#" if self.card_type else ""
+        directories = [self.path]
+
+        if self.card_type:
+            card_type_dir = os.path.join(self.path, self.card_type)
+            if os.path.isdir(card_type_dir):
+                directories = [card_type_dir]
+
+        while directories:
+            directory = directories.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                        continue
+
+                    filename = entry.name
+                    if not filename.endswith('.json') or not filename.startswith(file_prefix):
+                        continue
+
+                    parsed = parse_report_filename(filename)
+                    if parsed is None:
+                        continue
+
+                    sn_number, timestamp = parsed
+                    if sn_number < self.min_pn or sn_number > self.max_pn:
+                        continue
+
+                    # Update dictionary if this is a new SN or if this record is newer
+                    if sn_number not in latest_records or timestamp > latest_records[sn_number][0]:
+                        latest_records[sn_number] = (timestamp, entry.path)
         
-        # Regular expression pattern to extract SN number and timestamp
-        pattern = r'(V\d{6})_(\d{8}_\d{6})'
-        
-        # Walk through directories and process JSON files
-        for root, dirs, files in os.walk(self.path):
-            for filename in files:
-                if filename.endswith('.json'):
-                    full_path = os.path.join(root, filename)
-                    match = re.search(pattern, filename)
-                    
-                    if match:
-                        sn_number = match.group(1)
-                        timestamp_str = match.group(2)
-                        
-                        # Convert timestamp string to datetime object
-                        timestamp = datetime.strptime(timestamp_str, '%Y%m%d_%H%M%S')
-                        
-                        # Update dictionary if this is a new SN or if this record is newer
-                        if sn_number not in latest_records or timestamp > latest_records[sn_number][0]:
-                            latest_records[sn_number] = (timestamp, full_path)
-        
-        # Extract only the file paths from the latest records, sorted by SN number
-        result_files = [record[1] for record in sorted(latest_records.values(), 
-                                                    key=lambda x: x[1])]
-        
-        return result_files
+        # Keep only the file paths from the latest records
+        return {sn_number: record[1] for sn_number, record in latest_records.items()}
 
+    @profiler.timed("validate")
     def _check_all_tests(self, data, filename, pn):
         """
         Check if all tests are done and passed.
@@ -891,7 +3716,23 @@ class JsonProcessor:
         if not data["Passed"]:
             print(f"Neúspešné niektoré testy v súbore {filename}")
 
-            if get_user_choice("Želáte si pokračovať?", default=False):
+            decision = None
+            if self.decisions is not None:
+                failed_codes = [test["Code"] for test in data["Tests"] if not test["Passed"]]
+                decision = self.decisions.classify(data["SafeBytes"]["SN"], failed_codes)
+
+            if decision == FailureDecisions.REPAIRABLE:
+                print(f"Opraviteľná závada - {pn}")
+                self.repairable_count += 1
+                self.repairable_list.append(pn)
+            elif decision == FailureDecisions.UNREPAIRABLE:
+                print(f"Neopraviteľná závada - {pn}")
+                self.unrepairable_count += 1
+                self.unrepairable_list.append(pn)
+            elif not self.interactive:
+                print(f"Chýba rozhodnutie o závade - {pn}")
+                return False
+            elif get_user_choice("Želáte si pokračovať?", default=False):
                 if get_user_choice(f"Opraviteľná závada? - {pn}", default=True):
                     self.repairable_count += 1
                     self.repairable_list.append(pn)
@@ -903,6 +3744,7 @@ class JsonProcessor:
             print("")
         return True
 
+    @profiler.timed("validate")
     def _check_card_type(self, card_type, filename):
         """
         Verify card type consistency across files.
@@ -926,6 +3768,7 @@ class JsonProcessor:
         
         return True
 
+    @profiler.timed("validate")
     def _check_test_names(self, tests, filename):
         """
         Verify test names consistency across files.
@@ -956,6 +3799,7 @@ class JsonProcessor:
         
         return True
     
+    @profiler.timed("validate")
     def _check_code_name_pairs(self, tests, filename):
         """
         Kontroluje konzistenciu Code-Name párov medzi súbormi.
@@ -997,10 +3841,82 @@ class JsonProcessor:
         
         return True
 
+    @profiler.timed("load_report")
+    def _load_report(self, full_path, pn):
+        """
+        Read and parse one JSON report. Runs in loader thread.
+
+        Only fields needed for the protocol are extracted, reading stops early
+        when SN does not match or not all tests are done. Schema fingerprint of
+        tests is added as SchemaFingerprint. Complete reports are taken from
+        and stored to cache if it is enabled.
+
+        Args:
+            full_path (str): Path to JSON report
+            pn (int): Expected SN number
+
+        Returns:
+            dict: Parsed report
+        """
+        if self.cache is None:
+            return self._read_report(full_path, pn)
+
+        stat = os.stat(full_path)
+        data = self.cache.get(full_path, stat)
+        if data is None:
+            data = self._read_report(full_path, pn)
+            if "Tests" in data:
+                self.cache.put(full_path, stat, data)
+        return data
+
+    def _read_report(self, full_path, pn):
+        data = ReportReader.read(full_path, pn)
+        if "Tests" in data:
+            data["SchemaFingerprint"] = schema_fingerprint(data["Tests"])
+        return data
+
+    def _iter_loaded_reports(self, json_files_index):
+        """
+        Load reports concurrently and yield them in PN order.
+
+        Only a limited number of reports is loaded ahead of the consumer, so
+        memory stays bounded. Pending loads are cancelled when the consumer
+        stops early.
+
+        Args:
+            json_files_index (dict): SN number -> path of report
+
+        Yields:
+            tuple: (pn, path or None, Future with parsed report or None)
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        pns = range(self.min_pn, self.max_pn + 1)
+        window = self.load_workers * 4
+        pending = deque()
+        next_index = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.load_workers)
+        try:
+            for _ in pns:
+                while next_index < len(pns) and len(pending) < window:
+                    pn = pns[next_index]
+                    full_path = json_files_index.get(pn)
+                    future = executor.submit(self._load_report, full_path, pn) if full_path else None
+                    pending.append((pn, full_path, future))
+                    next_index += 1
+
+                yield pending.popleft()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @profiler.timed("process_files")
     def process_files(self):
         """
         Spracovanie JSON súborov z určeného adresára a podadresárov.
 
+        Súbory sa načítavajú paralelne, kontroly prebiehajú v poradí PN.
+
         Returns:
             bool: True ak je spracovanie úspešné, False inak
         """
@@ -1008,75 +3924,75 @@ class JsonProcessor:
             print(f"Adresár {self.path} neexistuje!")
             return False
 
-        all_json_files = self._get_list_of_all_json_files()
-            
-        for pn in range(self.min_pn, self.max_pn + 1):
-            found = False
-            for full_path in all_json_files:
-                filename = os.path.basename(full_path)
-                if f"V{pn:>06}" in filename:
-                    self.all_relevant_json_files.append(full_path)
-                    try:
-                        with open(full_path, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            
-                            if data["SafeBytes"]["SN"] != pn:
-                                print(f"Nesedí SN v súbore {filename}")
-                                return False
-
-                            if not self._check_all_tests(data, full_path, f"V{pn:>06}"):
-                                return False
-
-                            if not self._check_card_type(data["CardTypeName"], full_path):
-                                return False
-                            
-                            if not self._check_code_name_pairs(data["Tests"], filename):
-                                return False
-                        
-                            tests = {} 
-                            for test in data["Tests"]:
-                                test_data = {
-                                    "Code": test["Code"],
-                                    "Passed": test["Passed"],
-                                    "Report": test["Report"],
-                                    "ResultDesc": test["ResultDesc"],
-                                    "Unit": test.get("Unit", "")
-                                }
-                                
-                                if "Min" in test:
-                                    test_data["Min"] = test["Min"]
-                                if "Max" in test:
-                                    test_data["Max"] = test["Max"]
-                                
-                                tests[test["Name"]] = test_data
-
-                            if not self._check_test_names(tests, full_path):
-                                return False
-                            
-                            self.reports[pn] = {
-                                "Tests": tests,
-                                "Passed": data["Passed"],
-                                "AllTestsDone": data["AllTestsDone"],
-                                "UserName": data["UserName"],
-                                "CardTypeName": data["CardTypeName"]
-                            }
-                            
-                            found = True
-                            break
-
-                    except Exception as e:
-                        print(f"Chyba pri čítaní súboru {filename}: {str(e)}")
-                        return False
+        json_files_index = self._get_list_of_all_json_files()
             
-            if not found:
+        for pn, full_path, future in self._iter_loaded_reports(json_files_index):
+            if full_path is None:
                 print(f"Nenašiel sa súbor pre V{pn:>06}")
                 return False
 
+            filename = os.path.basename(full_path)
+            self.all_relevant_json_files.append(full_path)
+            try:
+                data = future.result()
+                
+                if data["SafeBytes"]["SN"] != pn:
+                    print(f"Nesedí SN v súbore {filename}")
+                    return False
+
+                if not self._check_all_tests(data, full_path, f"V{pn:>06}"):
+                    return False
+
+                if not self._check_card_type(data["CardTypeName"], full_path):
+                    return False
+                
+                # Detailed schema checks only when fingerprint differs from the first report
+                fingerprint = data["SchemaFingerprint"]
+                check_schema = fingerprint != self.first_schema_fingerprint
+                if self.first_schema_fingerprint is None:
+                    self.first_schema_fingerprint = fingerprint
+
+                if check_schema and not self._check_code_name_pairs(data["Tests"], filename):
+                    return False
+            
+                # Tests are already trimmed by ReportReader, only keyed by name
+                tests = {} 
+                for test in data["Tests"]:
+                    name = test.pop("Name")
+                    test.setdefault("Unit", "")
+                    tests[name] = test
+
+                if check_schema and not self._check_test_names(tests, full_path):
+                    return False
+                
+                # Results are stored in columnar matrix, test metadata only once
+                if self.results is None:
+                    self.results = ResultMatrix.from_tests(tests)
+                self.results.add_unit(pn, tests, data)
+
+                if self.report_index is not None:
+                    self.report_index.update_metadata(full_path, data["CardTypeName"], data["Passed"],
+                                                      data["AllTestsDone"])
+
+            except Exception as e:
+                print(f"Chyba pri čítaní súboru {filename}: {str(e)}")
+                return False
+
+        if self.report_index is not None:
+            self.report_index.save()
+
+        if self.cache is not None:
+            self.cache.prune()
+
         return True
 
     def get_reports(self):
         """Return dictionary with all processed reports."""
-        return self.reports
+        return self.results.to_reports() if self.results is not None else {}
+
+    def get_result_matrix(self):
+        """Return processed reports as columnar ResultMatrix."""
+        return self.results
     
     def get_num_of_repairable_pieces(self):
         """Return number of repairable pieces."""
@@ -1104,26 +4020,221 @@ class JsonProcessor:
     
 #####################################################################################################################
 #####################################################################################################################    
+def prepare_protocol_job(json_processor, protocol_number, production_doc, worker_name, note,
+                         operations, display_all_reports, output_dir, layout="A4", summary=False, sigma=3.0,
+                         chunk_pages=None, attachment_mode="files", failure_notes=True):
+    """
+    Collects everything needed for rendering protocol from processed reports.
+
+    Result contains only plain data, so it can be rendered in another process.
+
+    Args:
+        json_processor (JsonProcessor): Processor with successfully processed reports
+        protocol_number (str): Protocol number
+        production_doc (str): Production documentation number
+        worker_name (str): Responsible person
+        note (str): Note
+        operations (dict): ProductionProtocol operation attribute -> bool
+        display_all_reports (bool): Display all reports, not only reported tests
+        output_dir (str): Directory for output PDF
+        layout (str): Layout of test pages (ProtocolLayout.NAMES)
+        summary (bool): Statistics per test instead of results of all units
+        sigma (float): Units outside mean +- sigma * stdev are shown in summary mode
+        chunk_pages (int): Render in segments of this many pages (None - whole document in memory)
+        attachment_mode (str): Compressed reports or single bundle (AttachmentPacker.MODES)
+        failure_notes (bool): Failed result cells carry note with limits and measured value
+
+    Returns:
+        dict: Protocol job for render_protocol
+    """
+    return {
+        "protocol_number": protocol_number,
+        "product_code": json_processor.get_card_type(),
+        "min_pn": json_processor.min_pn,
+        "max_pn": json_processor.max_pn,
+        "repairable_list": list(json_processor.get_list_of_repairable_pieces()),
+        "unrepairable_list": list(json_processor.get_list_of_unrepairable_pieces()),
+        "production_doc": production_doc,
+        "worker_name": worker_name,
+        "check_date": datetime.now().strftime("%d.%m.%Y"),
+        "note": note,
+        "tests": json_processor.get_result_matrix(),
+        "operations": dict(operations),
+        "display_all_reports": display_all_reports,
+        "attachments": list(json_processor.get_list_of_relevant_json_files()),
+        "output_dir": output_dir,
+        "layout": layout,
+        "summary": summary,
+        "sigma": sigma,
+        "chunk_pages": chunk_pages,
+        "attachment_mode": attachment_mode,
+        "failure_notes": failure_notes
+    }
+
+@profiler.timed("render_protocol")
+def render_protocol(job):
+    """
+    Renders protocol PDF from prepared job.
+
+    Args:
+        job (dict): Protocol job from prepare_protocol_job
+
+    Returns:
+        str: Path to created PDF file
+    """
+    protocol_number = job["protocol_number"]
+    product_code = job["product_code"]
+    repairable_pcs_list = job["repairable_list"]
+    unrepairable_pcs_list = job["unrepairable_list"]
+
+    # Create protocol instance
+    protocol = ProductionProtocol(
+        protocol_number=protocol_number,
+        product_code=product_code,
+        min_pn=job["min_pn"],
+        max_pn=job["max_pn"],
+        unrepairable_count=len(unrepairable_pcs_list),
+        repairable_count=len(repairable_pcs_list),
+        production_doc=job["production_doc"],
+        worker_name=job["worker_name"],
+        check_date=job["check_date"],
+        note=job["note"],
+        tests=job["tests"]
+    )
+
+    # Set protocol properties
+    for attribute, value in job["operations"].items():
+        setattr(protocol, attribute, value)
+    protocol.display_all_reports = job["display_all_reports"]
+    protocol.layout = ProtocolLayout.from_name(job.get("layout", "A4"))
+    protocol.summary_mode = job.get("summary", False)
+    protocol.sigma_band = job.get("sigma", 3.0)
+    protocol.failure_notes = job.get("failure_notes", True)
+
+    # Footer is drawn directly during rendering
+    protocol.render_footer = True
+
+    # Create directory if it doesn't exist
+    output_dir = job["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Create file path
+    output_file = os.path.join(output_dir, f"Protocol_{protocol_number}_{product_code}.pdf")
+
+    # Reports are attached as compressed files or as single bundle
+    attachment_mode = job.get("attachment_mode", AttachmentPacker.FILES)
+    bundle_name = f"Reports_{protocol_number}_{product_code}"
+
+    # Large lots are rendered in segments streamed to output file
+    if job.get("chunk_pages"):
+        _write_protocol_segments(protocol, output_file, job["chunk_pages"], repairable_pcs_list,
+                                 unrepairable_pcs_list, job["attachments"], attachment_mode, bundle_name)
+        return output_file
+    
+    # Create PDF in memory
+    pdf_buffer = io.BytesIO()
+    protocol.create_pdf(pdf_buffer)
+    
+    print(f"\nProtokol {protocol_number} úspešne vytvorený.")
+
+    assembler = PdfAssembler(pdf_buffer)
+
+    # Add comments if needed, all annotations are added in one pass
+    annotations = PageAnnotations()
+    annotations.add_error_comments(repairable_pcs_list, unrepairable_pcs_list)
+    if annotations:
+        assembler.add_annotations(annotations)
+        print("Úspešné pridané komentáre.")
+
+    # Add attachments
+    assembler.add_attachments(job["attachments"], attachment_mode, bundle_name)
+    print("Úspešne pridané prílohy.")
+
+    # Write final PDF only once
+    assembler.write(output_file)
+
+    return output_file
+
+def _write_protocol_segments(protocol, output_file, pages_per_segment, repairable_pcs_list,
+                             unrepairable_pcs_list, attachments, attachment_mode="files", bundle_name="Reports"):
+    """
+    Renders protocol in segments and streams them into output file.
+
+    Only one segment is kept in memory at a time, so memory use does not
+    depend on number of units in the lot.
+
+    Args:
+        protocol (ProductionProtocol): Protocol to render
+        output_file (str): Path to output PDF file
+        pages_per_segment (int): Maximum number of pages in segment
+        repairable_pcs_list (list): Repairable pieces for comment on first page
+        unrepairable_pcs_list (list): Unrepairable pieces for comment on first page
+        attachments (list): Paths of files to attach
+        attachment_mode (str): Compressed files or single bundle (AttachmentPacker.MODES)
+        bundle_name (str): Name of bundle attachment without extension
+    """
+    import tempfile
+
+    partial_file = output_file + ".part"
+    with tempfile.TemporaryDirectory(prefix="tmu_segments_") as directory:
+        with open(partial_file, "wb") as stream:
+            writer = StreamingPdfWriter(stream)
+            annotations = PageAnnotations()
+            annotations.add_error_comments(repairable_pcs_list, unrepairable_pcs_list)
+            for segment_file in protocol.create_pdf_segments(directory, pages_per_segment):
+                writer.append_pdf(segment_file, annotations)
+                os.remove(segment_file)
+
+            print(f"\nProtokol {protocol.protocol_number} úspešne vytvorený.")
+            if unrepairable_pcs_list or repairable_pcs_list:
+                print("Úspešné pridané komentáre.")
+
+            writer.add_attachments(attachments, attachment_mode, bundle_name)
+            print("Úspešne pridané prílohy.")
+            writer.close()
+
+    os.replace(partial_file, output_file)
+
+def generate_protocol(json_processor, protocol_number, production_doc, worker_name, note,
+                      operations, display_all_reports, output_dir, layout="A4", summary=False, sigma=3.0,
+                      chunk_pages=None, attachment_mode="files", failure_notes=True):
+    """
+    Creates protocol PDF from processed reports.
+
+    Args:
+        json_processor (JsonProcessor): Processor with successfully processed reports
+        protocol_number (str): Protocol number
+        production_doc (str): Production documentation number
+        worker_name (str): Responsible person
+        note (str): Note
+        operations (dict): ProductionProtocol operation attribute -> bool
+        display_all_reports (bool): Display all reports, not only reported tests
+        output_dir (str): Directory for output PDF
+        layout (str): Layout of test pages (ProtocolLayout.NAMES)
+        summary (bool): Statistics per test instead of results of all units
+        sigma (float): Units outside mean +- sigma * stdev are shown in summary mode
+        chunk_pages (int): Render in segments of this many pages (None - whole document in memory)
+        attachment_mode (str): Compressed reports or single bundle (AttachmentPacker.MODES)
+        failure_notes (bool): Failed result cells carry note with limits and measured value
+
+    Returns:
+        str: Path to created PDF file
+    """
+    job = prepare_protocol_job(json_processor, protocol_number, production_doc, worker_name, note,
+                               operations, display_all_reports, output_dir, layout, summary, sigma,
+                               chunk_pages, attachment_mode, failure_notes)
+    return render_protocol(job)
+
 def main():
     print("Spustené generovanie výrobného protokolu.\n")
     
     # Default path to reports
-    default_path = "C:\\MIREL\\Reports_TUS"
+    default_path = DEFAULT_REPORTS_PATH
 
     # Get path to reports
     if not get_user_choice(f"Použiť defaultnú cestu ku reportom? {default_path}", default=True):
-        # Setup file dialog
-        root = tk.Tk()
-        root.withdraw()
-        root.lift()
-        root.focus_force()
-
         # Open dialog for selecting path to reports
-        default_path = filedialog.askdirectory(
-            parent=root,
-            initialdir=default_path,
-            title="Vyber priečinok s umiestnením reportov"
-        )
+        default_path = ask_directory(default_path, "Vyber priečinok s umiestnením reportov")
         print(f"Zvolená cesta ku reportom: {default_path}")
 
     # Get protocol number
@@ -1151,7 +4262,7 @@ def main():
 
     print("")
 
-    # Create JsonProcessor instance
+    # Create JsonProcessor instance - shared reports directory is only scanned, nothing is written there
     json_processor = JsonProcessor(min_pn, max_pn, path=default_path)
 
     # Process JSON files
@@ -1159,108 +4270,35 @@ def main():
         print('Neúspešné spracovanie json súborov.')
         input('Stlač ENTER pre ukončenie!')
         exit()
-
-    # Get product code from json
-    product_code = json_processor.get_card_type()
-
-    # Get repairable pieces info
-    if json_processor.get_num_of_repairable_pieces():
-        repairable_pcs_count = json_processor.get_num_of_repairable_pieces()
-        repairable_pcs_list = json_processor.get_list_of_repairable_pieces()
-    else:
-        repairable_pcs_count = 0
-        repairable_pcs_list = ""
-
-    # Get unrepairable pieces info
-    if json_processor.get_num_of_unrepairable_pieces():
-        unrepairable_pcs_count = json_processor.get_num_of_unrepairable_pieces()
-        unrepairable_pcs_list = json_processor.get_list_of_unrepairable_pieces()
-    else:
-        unrepairable_pcs_count = 0
-        unrepairable_pcs_list = ""
            
     try:
-        # Create protocol instance
-        protocol = ProductionProtocol(
-            protocol_number=protocol_number,
-            product_code=product_code,
-            min_pn=min_pn,
-            max_pn=max_pn,
-            unrepairable_count=unrepairable_pcs_count,
-            repairable_count=repairable_pcs_count,
-            production_doc=production_doc,
-            worker_name=worker_name,
-            check_date=datetime.now().strftime("%d.%m.%Y"),
-            note=note,
-            tests=json_processor.get_reports()
-        )
-
         # Set protocol properties
-        protocol.input_check =              get_user_choice("Vstupná kontrola?",                    default=True)
-        protocol.additional_assembly =      get_user_choice("Doosadenie, úprava DPS?",              default=True)
-        protocol.cable_production =         get_user_choice("Elektrické prepojenia - výroba?",      default=False)
-        protocol.cable_check =              get_user_choice("Elektrické prepojenia - kontrola?",    default=False)
-        protocol.isolation_measurement =    get_user_choice("Meranie izolačných pevností?",         default=True)
-        protocol.programming =              get_user_choice("Programovanie a konfigurácia?",        default=True)
-        protocol.electrical_test =          get_user_choice("Elektrický test DPS?",                 default=True)
-        protocol.coating =                  get_user_choice("Lakovanie a UV kontrola DPS?",         default=True)
-        protocol.component_fixing =         get_user_choice("Fixácia komponentov na DPS?",          default=True)
-        protocol.structural_assembly =      get_user_choice("Montáž konštrukčných prvkov?",         default=False)
-        protocol.calibration =              get_user_choice("Kalibrácia?",                          default=False)
-        protocol.product_marking =          get_user_choice("Označenie polotovaru?",                default=True)
-        protocol.finishing_work =           get_user_choice("Ukončovacie práce?",                   default=True)
+        operations = {}
+        for attribute, question, default in OPERATIONS:
+            operations[attribute] = get_user_choice(question, default=default)
 
         # Display all reports?
-        protocol.display_all_reports =      get_user_choice("\nZobraziť všetky reporty?", default=False)
+        display_all_reports = get_user_choice("\nZobraziť všetky reporty?", default=False)
 
         print("\nVyber priečinok pre uložonie protokolu.")
         
-        # Setup file dialog
-        root = tk.Tk()
-        root.withdraw()
-        root.lift()
-        root.focus_force()
-
         # Open dialog for selecting save directory
-        output_dir = filedialog.askdirectory(
-            parent=root,
-            initialdir=default_path,
-            title="Vyber priečinok pre uloženie protokolu"
-        )
+        output_dir = ask_directory(default_path, "Vyber priečinok pre uloženie protokolu")
         
         # Use default path if no directory selected
         if not output_dir:
             output_dir = default_path
-        
-        # Create directory if it doesn't exist
-        if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        
-        # Create file path
-        output_file = os.path.join(output_dir, f"Protocol_{protocol_number}_{product_code}.pdf")
-        
-        # Create PDF
-        protocol.create_pdf(output_file)
-        
-        print(f"\nProtokol {protocol_number} úspešne vytvorený.")
-
-        # Add footer
-        add_footer(output_file, protocol_number)
-        print("Úspešné pridané päty strán.")
-
-        # Add comments if needed
-        if unrepairable_pcs_list or repairable_pcs_list:
-            add_error_comments_to_pdf(
-                output_file, 
-                repairable_pcs_list,
-                unrepairable_pcs_list
-            )
-            print("Úspešné pridané komentáre.")
 
-        # Add attachments
-        json_files = json_processor.get_list_of_relevant_json_files()
-        add_attachments_to_pdf(output_file, json_files)
-        print("Úspešne pridané prílohy.")
+        output_file = generate_protocol(
+            json_processor,
+            protocol_number=protocol_number,
+            production_doc=production_doc,
+            worker_name=worker_name,
+            note=note,
+            operations=operations,
+            display_all_reports=display_all_reports,
+            output_dir=output_dir
+        )
 
         if get_user_choice("\nŽeláte si otvoriť protokol?", default=True):
             open_file(output_file)
@@ -1270,5 +4308,435 @@ def main():
         input('Stlač ENTER pre ukončenie!')
         exit()
 
+def run_generate(args):
+    """
+    Generates protocol without any user interaction (command "generate").
+
+    Args:
+        args (argparse.Namespace): Parsed arguments of generate command
+
+    Returns:
+        bool: True if protocol was created, False otherwise
+    """
+    try:
+        decisions = _decisions_from_args(args)
+    except (OSError, ValueError) as e:
+        print(f"Chyba pri načítaní rozhodnutí o závadách: {e}")
+        return False
+
+    json_processor = JsonProcessor(
+        args.min_pn,
+        args.max_pn,
+        path=args.path,
+        card_type=args.card_type,
+        use_index=args.use_index,
+        index_file=args.index_file,
+        decisions=decisions,
+        interactive=False,
+        cache=_cache_from_args(args)
+    )
+
+    if not json_processor.process_files():
+        print('Neúspešné spracovanie json súborov.')
+        return False
+
+    try:
+        output_file = generate_protocol(
+            json_processor,
+            protocol_number=args.protocol_number,
+            production_doc=args.doc,
+            worker_name=args.worker,
+            note=args.note,
+            operations={attribute: getattr(args, attribute) for attribute, _, _ in OPERATIONS},
+            display_all_reports=args.display_all_reports,
+            output_dir=args.output_dir or args.path,
+            layout=args.layout,
+            summary=args.summary,
+            sigma=args.sigma,
+            chunk_pages=args.chunk_pages,
+            attachment_mode=args.attachments,
+            failure_notes=args.failure_notes
+        )
+    except Exception as e:
+        print(f"Chyba pri vytváraní protokolu: {e}")
+        return False
+
+    if args.open:
+        open_file(output_file)
+
+    return True
+
+def _parse_flags(flags):
+    """
+    Convert protocol flags from batch manifest to settings.
+
+    Flags are operation names (input_check or input-check) optionally prefixed
+    with "no-" or "-" to disable them, and display_all_reports.
+
+    Args:
+        flags (str or list): Comma separated string or list of flags
+
+    Returns:
+        tuple: (operations dict, display_all_reports)
+    """
+    if isinstance(flags, str):
+        flags = flags.split(",")
+
+    operations = {attribute: default for attribute, _question, default in OPERATIONS}
+    display_all_reports = False
+
+    for flag in flags:
+        name = flag.strip().replace("-", "_")
+        if not name:
+            continue
+
+        value = True
+        if name.startswith("no_"):
+            name, value = name[3:], False
+        elif name.startswith("_"):
+            name, value = name[1:], False
+
+        if name == "display_all_reports":
+            display_all_reports = value
+        elif name in operations:
+            operations[name] = value
+        else:
+            raise ValueError(f"Neznámy príznak: {flag}")
+
+    return operations, display_all_reports
+
+def load_batch_manifest(path):
+    """
+    Load protocol jobs from batch manifest.
+
+    CSV manifest has header with columns protocol_number, min_pn, max_pn,
+    production_doc, flags and optional note. JSON manifest is a list of objects
+    with the same keys (flags can be a list).
+
+    Args:
+        path (str): Path to manifest
+
+    Returns:
+        list: Jobs as dicts (protocol_number, min_pn, max_pn, production_doc,
+            note, operations, display_all_reports)
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            lines = f.read().splitlines()
+        delimiter = ';' if lines and ';' in lines[0] else ','
+        rows = list(csv.DictReader(lines, delimiter=delimiter))
+
+    jobs = []
+    for row in rows:
+        operations, display_all_reports = _parse_flags(row.get("flags") or "")
+        jobs.append({
+            "protocol_number": str(row["protocol_number"]).strip(),
+            "min_pn": _parse_pn(str(row["min_pn"])),
+            "max_pn": _parse_pn(str(row["max_pn"])),
+            "production_doc": str(row["production_doc"]).strip(),
+            "note": row.get("note") or "",
+            "operations": operations,
+            "display_all_reports": display_all_reports
+        })
+    return jobs
+
+def _render_batch_job(job):
+    """
+    Renders one batch protocol. Runs in worker process.
+
+    Args:
+        job (dict): Protocol job from prepare_protocol_job
+
+    Returns:
+        tuple: (output file, render time in seconds, stages recorded by profiler)
+    """
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        output_file = render_protocol(job)
+    return output_file, time.perf_counter() - start, profiler.collect()
+
+def run_batch(args):
+    """
+    Generates several protocols from batch manifest (command "batch").
+
+    Reports are scanned once for all jobs. Each job is processed in this
+    process and rendered in a separate worker process, so processing of next
+    job overlaps with rendering of previous ones.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments of batch command
+
+    Returns:
+        bool: True if all protocols were created, False otherwise
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    try:
+        jobs = load_batch_manifest(args.manifest)
+        decisions = _decisions_from_args(args)
+    except (OSError, ValueError, KeyError, argparse.ArgumentTypeError) as e:
+        print(f"Chyba pri načítaní dávky: {e}")
+        return False
+
+    if not jobs:
+        print("Dávka neobsahuje žiadne protokoly.")
+        return False
+
+    if not os.path.exists(args.path):
+        print(f"Adresár {args.path} neexistuje!")
+        return False
+
+    batch_start = time.perf_counter()
+
+    # Single directory scan shared by all jobs
+    scanner = JsonProcessor(
+        min(job["min_pn"] for job in jobs),
+        max(job["max_pn"] for job in jobs),
+        path=args.path,
+        card_type=args.card_type,
+        use_index=args.use_index,
+        index_file=args.index_file
+    )
+    files_index = scanner._get_list_of_all_json_files()
+    print(f"Nájdených reportov: {len(files_index)} ({time.perf_counter() - batch_start:.2f} s)")
+    cache = _cache_from_args(args)
+
+    failed = []
+    created_units = 0
+    rendering = []
+
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        for job in jobs:
+            job_start = time.perf_counter()
+            print(f"\nSpracovanie protokolu {job['protocol_number']} (V{job['min_pn']:>06} - V{job['max_pn']:>06})")
+
+            json_processor = JsonProcessor(
+                job["min_pn"],
+                job["max_pn"],
+                path=args.path,
+                card_type=args.card_type,
+                decisions=decisions,
+                interactive=False,
+                files_index=files_index,
+                cache=cache
+            )
+            if not json_processor.process_files():
+                print(f"Neúspešné spracovanie json súborov pre protokol {job['protocol_number']}.")
+                failed.append(job["protocol_number"])
+                continue
+
+            protocol_job = prepare_protocol_job(
+                json_processor,
+                protocol_number=job["protocol_number"],
+                production_doc=job["production_doc"],
+                worker_name=args.worker,
+                note=job["note"],
+                operations=job["operations"],
+                display_all_reports=job["display_all_reports"],
+                output_dir=args.output_dir or args.path,
+                layout=args.layout,
+                summary=args.summary,
+                sigma=args.sigma,
+                chunk_pages=args.chunk_pages,
+                attachment_mode=args.attachments,
+                failure_notes=args.failure_notes
+            )
+            process_time = time.perf_counter() - job_start
+            rendering.append((job, process_time, executor.submit(_render_batch_job, protocol_job)))
+
+        print("\nProtokol        Kusy  Spracovanie  Vykreslenie  Spolu")
+        for job, process_time, future in rendering:
+            try:
+                output_file, render_time, stages = future.result()
+            except Exception as e:
+                print(f"Chyba pri vytváraní protokolu {job['protocol_number']}: {e}")
+                failed.append(job["protocol_number"])
+                continue
+
+            profiler.merge(stages)
+            units = job["max_pn"] - job["min_pn"] + 1
+            created_units += units
+            print(f"{job['protocol_number']:<14} {units:>5}  {process_time:>9.2f} s  {render_time:>9.2f} s  "
+                  f"{process_time + render_time:>6.2f} s  {output_file}")
+
+    total_time = time.perf_counter() - batch_start
+    created = len(jobs) - len(failed)
+    print(f"\nVytvorené protokoly: {created}/{len(jobs)}, celkový čas {total_time:.2f} s")
+    if total_time > 0:
+        print(f"Priepustnosť: {created / total_time:.2f} protokolov/s, {created_units / total_time:.1f} kusov/s")
+    if failed:
+        print(f"Neúspešné protokoly: {', '.join(failed)}")
+
+    return not failed
+
+def rebuild_report_index(path, index_file=None):
+    """
+    Rebuild persistent report index from scratch.
+
+    Args:
+        path (str): Base path of reports
+        index_file (str): Path to index file (next to reports if None)
+
+    Returns:
+        bool: True if index was rebuilt and saved, False otherwise
+    """
+    if not os.path.exists(path):
+        print(f"Adresár {path} neexistuje!")
+        return False
+
+    report_index = ReportIndex(path, index_file)
+    count = report_index.rebuild()
+    if not report_index.save():
+        return False
+
+    print(f"Index reportov {report_index.index_file} obnovený, počet reportov: {count}")
+    return True
+
+def _parse_pn(value):
+    """Argument type for production number in form 123 or V000123."""
+    try:
+        return int(value.strip().lstrip("Vv"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Neplatné výrobné číslo: {value}")
+
+def _parse_codes(value):
+    """Argument type for comma separated list of test codes."""
+    return [code.strip() for code in value.split(",") if code.strip()]
+
+def _decisions_from_args(args):
+    """
+    Create failure decision source from command line arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed arguments
+
+    Returns:
+        FailureDecisions: Decision source or None if no decision option was given
+    """
+    if not (args.decisions or args.repairable_codes or args.unrepairable_codes or args.failed_default):
+        return None
+
+    decisions = FailureDecisions.from_file(args.decisions) if args.decisions else FailureDecisions()
+    decisions.repairable_codes.update(args.repairable_codes)
+    decisions.unrepairable_codes.update(args.unrepairable_codes)
+    if args.failed_default:
+        decisions.default = args.failed_default
+    return decisions
+
+def _cache_from_args(args):
+    """Return ReportCache selected by arguments or None when cache is disabled."""
+    return ReportCache(args.cache_dir) if args.use_cache else None
+
+def _add_processing_arguments(parser):
+    """Add arguments for report lookup and failure decisions shared by headless commands."""
+    parser.add_argument("--path", default=DEFAULT_REPORTS_PATH, help="Cesta ku reportom")
+    parser.add_argument("--worker", required=True, help="Meno zodpovednej osoby")
+    parser.add_argument("--output-dir", help="Priečinok pre uloženie protokolu (predvolene cesta ku reportom)")
+    parser.add_argument("--card-type", help="Typ karty - prehľadávať len jej podpriečinok a súbory")
+    parser.add_argument("--index", dest="use_index", action="store_true",
+                        help="Hľadať reporty pomocou indexu (zapisuje sa do priečinka reportov, ak nie je zadaný --index-file)")
+    parser.add_argument("--index-file", help="Súbor indexu reportov pri --index (predvolene v priečinku reportov)")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="Nepoužiť cache spracovaných reportov")
+    parser.add_argument("--cache-dir", help="Priečinok cache spracovaných reportov")
+    parser.add_argument("--decisions", help="CSV/JSON súbor s rozhodnutiami o závadách")
+    parser.add_argument("--repairable-codes", type=_parse_codes, default=[], help="Kódy testov s opraviteľnou závadou (T1,T2)")
+    parser.add_argument("--unrepairable-codes", type=_parse_codes, default=[], help="Kódy testov s neopraviteľnou závadou (T1,T2)")
+    parser.add_argument("--failed-default", choices=[FailureDecisions.REPAIRABLE, FailureDecisions.UNREPAIRABLE],
+                        help="Rozhodnutie pre neúspešné kusy bez iného pravidla")
+    parser.add_argument("--font-dir", help="Priečinok so súbormi písma (arial.ttf, arialbd.ttf)")
+    parser.add_argument("--layout", choices=ProtocolLayout.NAMES, default="A4",
+                        help="Formát strán s výsledkami testov (viac kusov na stranu pri A3/na šírku)")
+    parser.add_argument("--summary", action="store_true",
+                        help="Súhrnné štatistiky testov, výsledky len pre kusy s chybou alebo mimo pásma")
+    parser.add_argument("--sigma", type=float, default=3.0, help="Šírka pásma v smerodajných odchýlkach (predvolene 3)")
+    parser.add_argument("--chunk-pages", type=int, metavar="N",
+                        help="Vykresľovať protokol po častiach s N stranami (stála pamäť pri veľkých dávkach)")
+    parser.add_argument("--attachments", choices=AttachmentPacker.MODES, default=AttachmentPacker.FILES,
+                        help="Reporty ako komprimované prílohy (files) alebo jeden archív (zip, tar.xz); "
+                             "files a tar.xz ukladajú rovnaké súbory raz, zip každú kópiu (nemá odkazy medzi položkami)")
+    parser.add_argument("--no-failure-notes", dest="failure_notes", action="store_false",
+                        help="Nepridávať k bunkám s chybou poznámky s limitmi a nameranou hodnotou")
+    profile_group = parser.add_argument_group("meranie výkonu")
+    profile_group.add_argument("--profile", action="store_true", help="Vypísať časy jednotlivých krokov (TMU_PROFILE)")
+    profile_group.add_argument("--profile-trace", metavar="FILE",
+                               help="Uložiť záznam krokov do JSON súboru vo formáte Chrome trace (TMU_PROFILE_TRACE)")
+    profile_group.add_argument("--profile-cprofile", metavar="FILE",
+                               help="Profilovať beh pomocou cProfile a uložiť štatistiky (TMU_PROFILE_CPROFILE)")
+    profile_group.add_argument("--profile-memory", action="store_true",
+                               help="Merať alokovanú pamäť krokov pomocou tracemalloc (TMU_PROFILE_MEMORY)")
+
+def parse_arguments(argv=None):
+    """
+    Parse command line arguments.
+
+    Args:
+        argv (list): Arguments (sys.argv[1:] if None)
+
+    Returns:
+        argparse.Namespace: Parsed arguments, command is None for interactive mode
+    """
+    parser = argparse.ArgumentParser(description="Generovanie výrobného protokolu z TMU reportov.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    generate_parser = subparsers.add_parser("generate", help="Vytvorí protokol bez interakcie s používateľom")
+    generate_parser.add_argument("--protocol-number", required=True, help="Číslo protokolu")
+    generate_parser.add_argument("--min-pn", type=_parse_pn, required=True, help="Najnižšie výrobné číslo (123 alebo V000123)")
+    generate_parser.add_argument("--max-pn", type=_parse_pn, required=True, help="Najvyššie výrobné číslo (123 alebo V000123)")
+    generate_parser.add_argument("--doc", required=True, help="Číslo výrobnej dokumentácie (XXXXYYYY_YYMMDD)")
+    generate_parser.add_argument("--note", default="", help="Poznámka")
+    generate_parser.add_argument("--display-all-reports", action="store_true", help="Zobraziť všetky reporty")
+    generate_parser.add_argument("--open", action="store_true", help="Otvoriť protokol po vytvorení")
+    _add_processing_arguments(generate_parser)
+
+    operations_group = generate_parser.add_argument_group("operácie")
+    for attribute, question, default in OPERATIONS:
+        operations_group.add_argument(f"--{attribute.replace('_', '-')}", dest=attribute, default=default,
+                                      action=argparse.BooleanOptionalAction, help=question)
+
+    batch_parser = subparsers.add_parser("batch", help="Vytvorí viac protokolov podľa manifestu")
+    batch_parser.add_argument("manifest", help="CSV/JSON manifest (protocol_number, min_pn, max_pn, production_doc, flags)")
+    batch_parser.add_argument("--processes", type=int, default=None, help="Počet procesov pre vykresľovanie (predvolene počet CPU)")
+    _add_processing_arguments(batch_parser)
+
+    index_parser = subparsers.add_parser("rebuild-index", help="Znovu vytvorí index reportov")
+    index_parser.add_argument("--path", default=DEFAULT_REPORTS_PATH, help="Cesta ku reportom")
+    index_parser.add_argument("--index-file", help="Súbor indexu reportov (predvolene v priečinku reportov)")
+
+    return parser.parse_args(argv)
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    # Required for worker processes of frozen executable
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+
+    args = parse_arguments()
+
+    # Font directory is passed through environment, so worker processes use it too
+    if getattr(args, "font_dir", None):
+        os.environ["TMU_FONT_DIR"] = args.font_dir
+
+    # Profiling settings are passed the same way, worker processes record stages too
+    profile_settings = [("profile_trace", "TMU_PROFILE_TRACE"), ("profile_cprofile", "TMU_PROFILE_CPROFILE"),
+                        ("profile_memory", "TMU_PROFILE_MEMORY")]
+    for attribute, variable in profile_settings:
+        if getattr(args, attribute, None):
+            os.environ[variable] = str(getattr(args, attribute))
+    if getattr(args, "profile", False) or any(getattr(args, attribute, None) for attribute, _ in profile_settings):
+        os.environ["TMU_PROFILE"] = "1"
+    profiler.configure()
+
+    try:
+        if args.command == "generate":
+            sys.exit(0 if run_generate(args) else 1)
+        elif args.command == "batch":
+            sys.exit(0 if run_batch(args) else 1)
+        elif args.command == "rebuild-index":
+            sys.exit(0 if rebuild_report_index(args.path, args.index_file) else 1)
+        else:
+            main()
+    finally:
+        profiler.report()
@@ -0,0 +1,96 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import TMU_ProtocolGenerator as generator
+
+@pytest.fixture
+def pdf_fonts():
+    try:
+        generator.fonts.register()
+    except FileNotFoundError as e:
+        pytest.skip(str(e))
+
+def _protocol():
+    return generator.ProductionProtocol(
+        protocol_number="1",
+        product_code="X",
+        min_pn=1,
+        max_pn=1,
+        production_doc="D",
+        worker_name="W",
+        check_date="01.01.2025",
+        tests=None
+    )
+
+def test_cell_notes_become_square_annotations(pdf_fonts):
+    buffer = io.BytesIO()
+    c = generator.canvas.Canvas(buffer, pagesize=generator.A4)
+    batch = generator.CellBatch()
+    batch.add_cell(10, 100, 10, 5, generator.Colors.RED, ("FAIL", 11, 97), 6)
+    batch.add_note(10, 100, 10, 5, "V000001", "T1: Test\nMin: 1")
+    batch.draw(c)
+    c.showPage()
+    c.save()
+
+    annotations = generator.PdfReader(buffer).pages[0]["/Annots"]
+    assert len(annotations) == 1
+    note = annotations[0].get_object()
+    assert note["/Subtype"] == "/Square"
+    assert note["/T"] == "V000001"
+    assert note["/Contents"] == "T1: Test\nMin: 1"
+    assert note["/BS"]["/W"] == 0
+
+def test_attachments_are_embedded(tmp_path):
+    generator._import_pdf_modules()
+    buffer = io.BytesIO()
+    c = generator.canvas.Canvas(buffer, pagesize=generator.A4)
+    c.showPage()
+    c.save()
+
+    reports = []
+    for name in ("a.json", "b.json"):
+        path = tmp_path / name
+        path.write_text(f'{{"Name": "{name}"}}', encoding="utf-8")
+        reports.append(str(path))
+
+    assembler = generator.PdfAssembler(buffer)
+    assembler.add_attachments(reports)
+    output_file = str(tmp_path / "out.pdf")
+    assembler.write(output_file)
+
+    attachments = generator.PdfReader(output_file).attachments
+    assert sorted(attachments) == ["a.json", "b.json"]
+    assert attachments["a.json"] == [b'{"Name": "a.json"}']
+
+def test_font_is_set_again_on_new_page_and_in_form(pdf_fonts):
+    protocol = _protocol()
+    buffer = io.BytesIO()
+    c = protocol._begin_canvas(buffer, generator.A4)
+
+    protocol._write_text(c, "first", 10, 100)
+    protocol._do_form(c, "form", lambda: protocol._write_text(c, "form", 10, 90))
+    protocol._write_text(c, "same page", 10, 80)
+    protocol._add_page(c)
+    protocol._write_text(c, "second", 10, 100)
+    c.showPage()
+    c.save()
+
+    pages = generator.PdfReader(buffer).pages
+    first_page = pages[0].get_contents().get_data()
+    form = list(pages[0]["/Resources"]["/XObject"].values())[0].get_object().get_data()
+    second_page = pages[1].get_contents().get_data()
+
+    # Every text is written in Arial, not in default font of new page or form
+    for stream, count in ((first_page, 2), (form, 1), (second_page, 1)):
+        texts = [line for line in stream.split(b"\n") if b" Tj" in line]
+        assert len(texts) == count
+        assert all(b"/F2+0 9 Tf" in line for line in texts)
+
+def test_repeated_attachment_names_get_numeric_suffix():
+    names = ["a.json", "b.json", "a.json", "a_2.json", "a.json"]
+    assert generator.AttachmentPacker._unique_names(names) == ["a.json", "b.json", "a_3.json", "a_2.json", "a_4.json"]
@@ -0,0 +1,83 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import TMU_ProtocolGenerator as generator
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}")
+    return path
+
+def _write_overlapping_reports(base):
+    """Reports of two card types, other card type has newer report with the same SN."""
+    expected = {
+        pn: _touch(os.path.join(base, "BIOM.2.6MA", f"BIOM.2.6MA#V{pn:06d}_20250603_141404.json"))
+        for pn in (666, 667, 668)
+    }
+    _touch(os.path.join(base, "BIOM.2.6MA", "BIOM.2.6MA#V000666_20250601_080000.json"))
+    other = _touch(os.path.join(base, "OTHER", "OTHER#V000666_20250701_120000.json"))
+    return expected, other
+
+def test_index_keeps_latest_report_per_card_type(tmp_path):
+    expected, other = _write_overlapping_reports(str(tmp_path))
+
+    index = generator.ReportIndex(str(tmp_path))
+    index.refresh()
+
+    assert index.get_latest_files(666, 668, "BIOM.2.6MA") == expected
+    assert index.get_latest_files(666, 668, "OTHER") == {666: other}
+    # Without card type the newest report of any card type is returned
+    assert index.get_latest_files(666, 668) == {666: other, 667: expected[667], 668: expected[668]}
+
+def test_index_matches_directory_scan(tmp_path):
+    _write_overlapping_reports(str(tmp_path))
+
+    for card_type in ("BIOM.2.6MA", "OTHER", None):
+        scanned = generator.JsonProcessor(666, 668, path=str(tmp_path), card_type=card_type)
+        indexed = generator.JsonProcessor(666, 668, path=str(tmp_path), card_type=card_type, use_index=True)
+        assert indexed._get_list_of_all_json_files() == scanned._get_list_of_all_json_files()
+
+def test_index_survives_save_and_load(tmp_path):
+    base = str(tmp_path / "reports")
+    expected, _ = _write_overlapping_reports(base)
+    index_file = str(tmp_path / "index.json")
+
+    index = generator.ReportIndex(base, index_file)
+    index.refresh()
+    assert index.save()
+
+    loaded = generator.ReportIndex(base, index_file)
+    assert loaded.load()
+    assert loaded.refresh() == 0
+    assert loaded.get_latest_files(666, 668, "BIOM.2.6MA") == expected
+
+def test_unchanged_reports_do_not_rewrite_index(tmp_path):
+    base = str(tmp_path)
+    expected, _ = _write_overlapping_reports(base)
+
+    # Index file inside indexed root changes mtime of the root on every save
+    index = generator.ReportIndex(base)
+    index.refresh()
+    assert index.save()
+    assert index.refresh() == 0
+    saved = os.stat(index.index_file).st_mtime_ns
+
+    for _ in range(2):
+        loaded = generator.ReportIndex(base)
+        assert loaded.load()
+        loaded.refresh()
+        assert not loaded.modified
+        assert loaded.save()
+        assert loaded.get_latest_files(666, 668, "BIOM.2.6MA") == expected
+    assert os.stat(index.index_file).st_mtime_ns == saved
+
+    # New report is still found and written to index
+    added = _touch(os.path.join(base, "BIOM.2.6MA", "BIOM.2.6MA#V000669_20250603_141404.json"))
+    loaded = generator.ReportIndex(base)
+    assert loaded.load()
+    loaded.refresh()
+    assert loaded.modified
+    assert loaded.get_latest_files(669, 669, "BIOM.2.6MA") == {669: added}